@@ -0,0 +1,65 @@
+"""Inventory parse/dump time against inventory size, pure-Python vs libyaml.
+
+Run with ``uv run python benchmarks/bench_inventory.py``. The inventory is written
+with the pure-Python dumper (YAML_DUMPER); the CSafeDumper columns show what
+libyaml would save and whether its output is byte-identical.
+"""
+
+from __future__ import annotations
+
+import copy
+import time
+
+import yaml
+
+from wtplan.inventory import DEFAULT_INVENTORY, YAML_DUMPER, YAML_LOADER
+
+SIZES = (10, 100, 500, 1000, 5000)
+ROUNDS = 3
+C_DUMPER: type | None = getattr(yaml, "CSafeDumper", None)
+
+
+def make_inventory(n: int) -> dict:
+    inv = copy.deepcopy(DEFAULT_INVENTORY)
+    inv["toolbox_dir"] = "/srv/toolbox"
+    inv["repos"] = {f"repo{i}": {"url": f"git@example.com:group/repo{i}.git"} for i in range(n)}
+    inv["presets"] = {f"preset{i}": {"primary_repo": f"repo{i}", "repos": [f"repo{i}", f"repo{(i + 1) % n}"]} for i in range(n)}
+    inv["links_repo_root"] = [{"source": f"cfg/{i}", "policy": {"type": "copy"}} for i in range(n // 10 + 1)]
+    return inv
+
+
+def best(fn, *args, **kwargs) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        t = time.perf_counter()
+        fn(*args, **kwargs)
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+def _ms(seconds: float | None) -> str:
+    return f"{'n/a':>9}" if seconds is None else f"{seconds * 1e3:>7.1f}ms"
+
+
+def main() -> None:
+    c_name = C_DUMPER.__name__ if C_DUMPER is not None else "unavailable"
+    print(f"libyaml: {yaml.__with_libyaml__}  loader={YAML_LOADER.__name__} dumper={YAML_DUMPER.__name__} C dumper={c_name}")
+    print(f"{'repos':>10} {'bytes':>9} {'parse py':>9} {'parse C':>9} {'dump py':>9} {'dump C':>9}  C identical")
+    for n in SIZES:
+        inv = make_inventory(n)
+        text = yaml.dump(inv, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
+        parse_py = best(yaml.load, text, Loader=yaml.SafeLoader)
+        parse_c = best(yaml.load, text, Loader=YAML_LOADER)
+        dump_py = best(yaml.dump, inv, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
+        dump_c = identical = None
+        if C_DUMPER is not None:
+            dump_c = best(yaml.dump, inv, Dumper=C_DUMPER, sort_keys=False, allow_unicode=True)
+            identical = yaml.dump(inv, Dumper=C_DUMPER, sort_keys=False, allow_unicode=True) == text
+        print(
+            f"{n:>10} {len(text):>9} {_ms(parse_py)} {_ms(parse_c)} {_ms(dump_py)} {_ms(dump_c)}  "
+            f"{'n/a' if identical is None else identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
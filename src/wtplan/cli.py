@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import subprocess
 import sys
 from pathlib import Path
 from typing import Annotated
@@ -21,18 +22,12 @@ if _truthy_env("NO_COLOR"):
 import typer  # noqa: E402
 from rich.console import Console  # noqa: E402
 
+from wtplan import client, tools  # noqa: E402
 from wtplan.core import ensure_inventory  # noqa: E402
+from wtplan.daemon import DaemonRunningError, serve  # noqa: E402
 from wtplan.inventory import load_inventory  # noqa: E402
-from wtplan.mcp_server import (  # noqa: E402
-    mcp,
-    tool_plan,
-    tool_preset_add,
-    tool_preset_path,
-    tool_preset_rm,
-    tool_repo_add,
-    tool_repo_path,
-    tool_repo_rm,
-)
+from wtplan.tools import WorkspaceMode  # noqa: E402
+from wtplan.trace import TRACE_ENV, trace_target  # noqa: E402
 
 NO_COLOR = _truthy_env("NO_COLOR")
 
@@ -41,6 +36,12 @@ console = Console(
     color_system=None if NO_COLOR else "auto",
     force_terminal=False if NO_COLOR else None,
 )
+err_console = Console(
+    stderr=True,
+    no_color=NO_COLOR,
+    color_system=None if NO_COLOR else "auto",
+    force_terminal=False if NO_COLOR else None,
+)
 app = typer.Typer(
     name="wtplan",
     help="Manage Git worktrees across multiple repositories",
@@ -54,6 +55,16 @@ app.add_typer(preset_app, name="preset")
 app.add_typer(repo_app, name="repo")
 
 
+@app.callback()
+def _root(
+    trace: Annotated[
+        bool, typer.Option("--trace", help=f"Record timing spans into the result and a trace file (same as {TRACE_ENV}=1)")
+    ] = False,
+) -> None:
+    if trace and trace_target() is None:
+        os.environ[TRACE_ENV] = "1"
+
+
 @app.command()
 def init(
     toolbox: Annotated[str | None, typer.Option("--toolbox", help="Toolbox directory path")] = None,
@@ -70,12 +81,76 @@ def init(
 @app.command()
 def plan(
     workspace_id: Annotated[str | None, typer.Option("--workspace-id", help="Workspace identifier")] = None,
+    all_workspaces: Annotated[bool, typer.Option("--all", help="Summarize every workspace under workspaces_dir")] = False,
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Workspaces planned in parallel")] = None,
 ) -> None:
     """Show differences between inventory and actual state."""
-    res = tool_plan(workspace_id=workspace_id)
+    res = tools.plan(workspace_id=workspace_id, all_workspaces=all_workspaces, jobs=jobs)
+    console.print_json(data=res)
+
+
+@app.command("list")
+def list_workspaces() -> None:
+    """List indexed workspaces."""
+    res = tools.list_workspaces()
     console.print_json(data=res)
 
 
+@app.command()
+def gc(
+    older_than: Annotated[
+        float | None, typer.Option("--older-than", min=0, help="Select workspaces idle for this many days")
+    ] = None,
+    merged: Annotated[bool, typer.Option("--merged", help="Select workspaces whose branches are merged")] = False,
+    apply: Annotated[bool, typer.Option("--apply", help="Remove now (default: report only)")] = False,
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Workspaces checked/removed in parallel")] = None,
+) -> None:
+    """Reclaim disk from stale issue workspaces (safe-remove checks apply)."""
+    if older_than is None and not merged:
+        raise typer.BadParameter("give --older-than and/or --merged", param_hint="--older-than")
+    res = tools.gc(older_than, merged, apply, jobs)
+    console.print_json(data=res)
+
+
+@app.command()
+def du(
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Trees walked in parallel")] = None,
+) -> None:
+    """Disk usage per workspace and bare repo (unique vs hard-linked bytes)."""
+    res = tools.du(jobs)
+    console.print_json(data=res)
+
+
+@app.command()
+def daemon(
+    detach: Annotated[bool, typer.Option("--detach", help="Start in the background and return")] = False,
+    stop: Annotated[bool, typer.Option("--stop", help="Stop the daemon serving this directory")] = False,
+    status: Annotated[bool, typer.Option("--status", help="Report whether a daemon serves this directory")] = False,
+) -> None:
+    """Serve path/plan/list from a warm background process (optional)."""
+    base = Path.cwd()
+    if stop or status:
+        res = client.request(base, "shutdown" if stop else "ping")
+        console.print_json(data={"running": res is not None, **(res or {})})
+        return
+    if detach:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "wtplan", "daemon"],
+            cwd=base,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        console.print_json(data={"socket": str(client.socket_path(base)), "pid": proc.pid})
+        return
+    try:
+        serve(base)
+    except DaemonRunningError as e:
+        err_console.print(str(e), style="yellow")
+        raise typer.Exit(1) from None
+
+
 @app.command()
 def completion(
     shell: Annotated[str, typer.Argument(help="Shell type")] = "bash",
@@ -90,7 +165,7 @@ _wtplan_completions() {
   local cur
   COMPREPLY=()
   cur="${COMP_WORDS[COMP_CWORD]}"
-  local cmds="init plan preset repo completion"
+  local cmds="init plan list gc du daemon preset repo completion"
   if [[ ${COMP_CWORD} -eq 1 ]]; then
     COMPREPLY=( $(compgen -W "${cmds}" -- "${cur}") )
     return 0
@@ -101,24 +176,79 @@ complete -F _wtplan_completions wtplan
     print(script.strip())
 
 
+def _print_progress(subject: str, message: str) -> None:
+    err_console.print(f"[{subject}] {message}", markup=False, highlight=False, style="dim")
+
+
 # Preset subcommands
 @preset_app.command("add")
 def preset_add(
     preset: Annotated[str, typer.Argument(help="Preset name")],
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
-    base: Annotated[str | None, typer.Option("--base", help="Base directory")] = None,
+    base: Annotated[str | None, typer.Option("--base", help="Base branch/ref for the issue branch")] = None,
     apply: Annotated[bool, typer.Option("--apply", help="Apply the plan immediately")] = False,
     force_links: Annotated[bool, typer.Option("--force-links", help="Force overwrite when syncing")] = False,
     delete_links: Annotated[bool, typer.Option("--delete-links", help="Delete extra files when syncing")] = False,
+    jobs: Annotated[
+        int | None, typer.Option("--jobs", "-j", min=1, help="Parallel workers for git and link operations")
+    ] = None,
 ) -> None:
     """Create workspace from preset + Issue IID."""
-    res = tool_preset_add(
-        preset=preset,
-        issue_iid=issue_iid,
-        base=base,
-        apply=apply,
-        force_links=force_links,
-        delete_links=delete_links,
+    res = tools.workspace_add(
+        WorkspaceMode.PRESET,
+        preset,
+        issue_iid,
+        base,
+        apply,
+        force_links,
+        delete_links,
+        jobs,
+        progress=_print_progress if apply else None,
+    )
+    console.print_json(data=res)
+
+
+def _read_iids(source: str) -> list[int]:
+    """Issue IIDs from a file (or stdin for "-"): one per line, blank lines and '#' comments ignored."""
+    text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    iids = []
+    for n, line in enumerate(text.splitlines(), 1):
+        value = line.split("#", 1)[0].strip()
+        if not value:
+            continue
+        if not value.isdigit():
+            raise typer.BadParameter(f"{source}:{n}: not an issue IID: {value!r}", param_hint="--from-file")
+        iids.append(int(value))
+    return iids
+
+
+@preset_app.command("add-many")
+def preset_add_many(
+    preset: Annotated[str, typer.Argument(help="Preset name")],
+    issue_iids: Annotated[list[int] | None, typer.Argument(help="GitLab Issue IIDs")] = None,
+    from_file: Annotated[
+        str | None, typer.Option("--from-file", help="File with one Issue IID per line ('-' for stdin)")
+    ] = None,
+    base: Annotated[str | None, typer.Option("--base", help="Base branch/ref for the issue branches")] = None,
+    apply: Annotated[bool, typer.Option("--apply", help="Apply the plan immediately")] = False,
+    force_links: Annotated[bool, typer.Option("--force-links", help="Force overwrite when syncing")] = False,
+    delete_links: Annotated[bool, typer.Option("--delete-links", help="Delete extra files when syncing")] = False,
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Workspaces provisioned in parallel")] = None,
+) -> None:
+    """Create workspaces from preset for many Issue IIDs at once."""
+    iids = list(issue_iids or []) + (_read_iids(from_file) if from_file else [])
+    if not iids:
+        raise typer.BadParameter("give issue IIDs as arguments or with --from-file", param_hint="ISSUE_IIDS")
+    res = tools.workspace_add_batch(
+        WorkspaceMode.PRESET,
+        preset,
+        iids,
+        base,
+        apply,
+        force_links,
+        delete_links,
+        jobs,
+        progress=_print_progress if apply else None,
     )
     console.print_json(data=res)
 
@@ -127,14 +257,12 @@ def preset_add(
 def preset_rm(
     preset: Annotated[str, typer.Argument(help="Preset name")],
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
-    force: Annotated[bool, typer.Option("--force", help="Force removal without safety checks")] = False,
+    force: Annotated[bool, typer.Option("--force", help="Remove even dirty/unpushed/diverged worktrees")] = False,
+    apply: Annotated[bool, typer.Option("--apply", help="Remove now (default: show the plan only)")] = False,
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Parallel workers for git checks")] = None,
 ) -> None:
     """Remove workspace from preset + Issue IID."""
-    res = tool_preset_rm(
-        preset=preset,
-        issue_iid=issue_iid,
-        force=force,
-    )
+    res = tools.workspace_remove(WorkspaceMode.PRESET, preset, issue_iid, force, apply, jobs)
     console.print_json(data=res)
 
 
@@ -144,10 +272,7 @@ def preset_path(
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
 ) -> None:
     """Return absolute path of preset workspace (read-only reference)."""
-    res = tool_preset_path(
-        preset=preset,
-        issue_iid=issue_iid,
-    )
+    res = tools.workspace_location(WorkspaceMode.PRESET, preset, issue_iid)
     print(res["path"])
 
 
@@ -156,19 +281,25 @@ def preset_path(
 def repo_add(
     repo: Annotated[str, typer.Argument(help="Repository name")],
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
-    base: Annotated[str | None, typer.Option("--base", help="Base directory")] = None,
+    base: Annotated[str | None, typer.Option("--base", help="Base branch/ref for the issue branch")] = None,
     apply: Annotated[bool, typer.Option("--apply", help="Apply the plan immediately")] = False,
     force_links: Annotated[bool, typer.Option("--force-links", help="Force overwrite when syncing")] = False,
     delete_links: Annotated[bool, typer.Option("--delete-links", help="Delete extra files when syncing")] = False,
+    jobs: Annotated[
+        int | None, typer.Option("--jobs", "-j", min=1, help="Parallel workers for git and link operations")
+    ] = None,
 ) -> None:
     """Create workspace from single repo + Issue IID."""
-    res = tool_repo_add(
-        repo=repo,
-        issue_iid=issue_iid,
-        base=base,
-        apply=apply,
-        force_links=force_links,
-        delete_links=delete_links,
+    res = tools.workspace_add(
+        WorkspaceMode.REPO,
+        repo,
+        issue_iid,
+        base,
+        apply,
+        force_links,
+        delete_links,
+        jobs,
+        progress=_print_progress if apply else None,
     )
     console.print_json(data=res)
 
@@ -177,14 +308,12 @@ def repo_add(
 def repo_rm(
     repo: Annotated[str, typer.Argument(help="Repository name")],
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
-    force: Annotated[bool, typer.Option("--force", help="Force removal without safety checks")] = False,
+    force: Annotated[bool, typer.Option("--force", help="Remove even dirty/unpushed/diverged worktrees")] = False,
+    apply: Annotated[bool, typer.Option("--apply", help="Remove now (default: show the plan only)")] = False,
+    jobs: Annotated[int | None, typer.Option("--jobs", "-j", min=1, help="Parallel workers for git checks")] = None,
 ) -> None:
     """Remove workspace from single repo + Issue IID."""
-    res = tool_repo_rm(
-        repo=repo,
-        issue_iid=issue_iid,
-        force=force,
-    )
+    res = tools.workspace_remove(WorkspaceMode.REPO, repo, issue_iid, force, apply, jobs)
     console.print_json(data=res)
 
 
@@ -194,10 +323,7 @@ def repo_path(
     issue_iid: Annotated[int, typer.Argument(help="GitLab Issue IID")],
 ) -> None:
     """Return absolute path of repo workspace (read-only reference)."""
-    res = tool_repo_path(
-        repo=repo,
-        issue_iid=issue_iid,
-    )
+    res = tools.workspace_location(WorkspaceMode.REPO, repo, issue_iid)
     print(res["path"])
 
 
@@ -231,7 +357,9 @@ def path(
 def main() -> None:
     """Main entry point - CLI or MCP server mode."""
     if len(sys.argv) == 1:
-        # No args → MCP server mode
+        # No args → MCP server mode; FastMCP is only imported here to keep CLI startup fast
+        from wtplan.mcp_server import mcp  # noqa: PLC0415
+
         mcp.run()
     else:
         # Has args → CLI mode
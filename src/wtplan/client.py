@@ -0,0 +1,83 @@
+"""Console entry point with a fast path through the optional ``wtplan daemon``.
+
+Only the standard library (and the stdlib-only :mod:`wtplan.trace`) is imported
+here: when a daemon serves the current directory, ``path``/``plan``/``list`` are
+answered over its Unix socket without loading Typer, Rich, YAML or the inventory;
+anything else (or no daemon, or tracing) falls through to :mod:`wtplan.cli`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any
+
+from wtplan.trace import trace_target
+
+PROTOCOL_VERSION = 1
+SOCKET_NAME = ".wtplan.sock"
+CLIENT_TIMEOUT = 30.0
+
+
+def socket_path(base_dir: Path) -> Path:
+    """Daemon socket, beside the inventory of ``base_dir``."""
+    return base_dir / SOCKET_NAME
+
+
+def request(base_dir: Path, op: str, timeout: float = CLIENT_TIMEOUT, **args: Any) -> dict[str, Any] | None:
+    """Send one request to the daemon serving ``base_dir``; None when there is no usable daemon."""
+    path = socket_path(base_dir)
+    if not path.exists():
+        return None
+    msg = {"v": PROTOCOL_VERSION, "cwd": str(base_dir.resolve()), "op": op, "args": args}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(msg).encode() + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+        reply = json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict) or not reply.get("ok"):
+        return None
+    return reply["result"]
+
+
+def _fast_request(argv: list[str]) -> tuple[str, dict[str, Any]] | None:
+    """Map the argv of a forwardable command to (op, args)."""
+    match argv:
+        case [("preset" | "repo") as mode, "path", identifier, iid] if iid.isdigit():
+            return "path", {"mode": mode, "identifier": identifier, "issue_iid": int(iid)}
+        case ["list"]:
+            return "list", {}
+        case ["plan"]:
+            return "plan", {}
+        case ["plan", "--all"]:
+            return "plan", {"all_workspaces": True}
+        case ["plan", "--workspace-id", workspace_id]:
+            return "plan", {"workspace_id": workspace_id}
+    return None
+
+
+def main() -> None:
+    argv = sys.argv[1:]
+    # traced runs stay in-process so the spans describe this command
+    in_process = os.environ.get("WTPLAN_NO_DAEMON") or trace_target() is not None
+    fast = _fast_request(argv) if not in_process else None
+    if fast is not None:
+        op, args = fast
+        res = request(Path.cwd(), op, **args)
+        if res is not None:
+            print(res["path"] if op == "path" else json.dumps(res, indent=2, ensure_ascii=False))
+            return
+
+    from wtplan.cli import main as cli_main  # noqa: PLC0415
+
+    cli_main()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import os
 import shutil
-from dataclasses import dataclass
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any
 
-from .inventory import DEFAULT_INVENTORY, resolve_paths, write_inventory
-from .policy import LinkPolicy, per_link_policy
+from . import trace
+from .inventory import DEFAULT_INVENTORY, InventoryPaths, resolve_paths, write_inventory
+from .manifest import LinkManifest
+from .policy import LINK_TYPES, LinkPolicy, per_link_policy
+from .sync import Change, diff_path, sync_path
+from .workers import Transfer, resolve, worker_pool
 
 INVENTORY_FILE = ".wtplan.yml"
 
@@ -28,6 +34,13 @@ def _validate_link_item(it: Any) -> tuple[dict | None, PlanItem | None]:
     return it, None
 
 
+def _validate_link_type(p: LinkPolicy, dst: Path) -> PlanItem | None:
+    """Validate the effective link type (per item or from default_policy)."""
+    if p.type not in LINK_TYPES:
+        return PlanItem("CONFLICT", str(dst), f"unknown link type: {p.type} (expected one of {', '.join(LINK_TYPES)})")
+    return None
+
+
 def _validate_source_exists(src: Path, dst: Path) -> PlanItem | None:
     """Validate source exists."""
     if not src.exists():
@@ -35,6 +48,32 @@ def _validate_source_exists(src: Path, dst: Path) -> PlanItem | None:
     return None
 
 
+def _link_target(base_dir: Path, target: str) -> Path:
+    """Absolute link target path; the final component is not resolved so existing symlinks stay visible."""
+    return Path(os.path.normpath(base_dir.resolve() / target))
+
+
+def _change_item(dst: Path, c: Change, *, applied: bool, link_type: str = "copy") -> PlanItem:
+    """PlanItem for one entry of a copy- or hardlink-mode sync."""
+    kind = "dir" if c.is_dir else "file"
+    hardlink = link_type == "hardlink"
+    if c.kind == "DELETE":
+        detail = f"{'deleted' if applied else 'delete'} extra {kind} (rsync -a --delete)"
+    elif c.meta:
+        detail = f"{'updated' if applied else 'update'} mode/mtime (same content)"
+    elif c.is_link:
+        detail = "symlink"
+    elif not applied:
+        detail = f"{link_type} {kind}"
+    elif hardlink and c.strategy not in ("", "hardlink"):
+        detail = f"copied {kind} ({c.strategy}; hard link not possible)"
+    else:
+        detail = f"{'hardlinked' if hardlink else 'copied'} {kind}"
+        if c.strategy not in ("", "hardlink"):
+            detail += f" ({c.strategy})"
+    return PlanItem(c.kind, str(dst) if c.rel == "." else str(dst / c.rel), detail)
+
+
 def ensure_inventory(base_dir: Path, toolbox_dir: str | None = None) -> Path:
     inv_path = base_dir / INVENTORY_FILE
     if inv_path.exists():
@@ -61,8 +100,16 @@ def compute_workspace_id(repo_upper: str, iid: int) -> str:
     return f"{repo_upper}_ISSUE_{iid:04d}"
 
 
-def workspace_path(inv: dict, base_dir: Path, preset: str | None, iid: int | None, repo: str | None) -> Path:
+def workspace_path(
+    inv: dict,
+    base_dir: Path,
+    preset: str | None,
+    iid: int | None,
+    repo: str | None,
+    paths: InventoryPaths | None = None,
+) -> Path:
     presets = inv.get("presets") or {}
+    paths = paths or resolve_paths(inv, base_dir)
 
     # Single repo mode: when preset is None
     if preset is None:
@@ -70,7 +117,6 @@ def workspace_path(inv: dict, base_dir: Path, preset: str | None, iid: int | Non
         alias = repo or primary
         repo_upper = primary.upper()
         ws_id = compute_workspace_id(repo_upper, iid or 0)
-        paths = resolve_paths(inv, base_dir)
         return paths.workspaces_dir / ws_id / alias
 
     # Preset mode
@@ -81,11 +127,22 @@ def workspace_path(inv: dict, base_dir: Path, preset: str | None, iid: int | Non
     alias = repo or primary
     repo_upper = primary.upper()
     ws_id = compute_workspace_id(repo_upper, iid or 0)
-    paths = resolve_paths(inv, base_dir)
     return paths.workspaces_dir / ws_id / alias
 
 
-def plan_links(inv: dict, base_dir: Path, policy: LinkPolicy) -> list[PlanItem]:
+def workspace_repos(inv: dict, preset: str | None, repo: str | None) -> list[str]:
+    """Repositories checked out in a workspace: the preset's ``repos`` (primary first) or the single repo."""
+    if preset is None:
+        return [repo or "default"]
+    p = (inv.get("presets") or {}).get(preset)
+    if not p:
+        raise KeyError(f"Unknown preset: {preset}")
+    primary = str(p.get("primary_repo"))
+    repos = [str(r) for r in (p.get("repos") or [])]
+    return [primary, *(r for r in repos if r != primary)]
+
+
+def plan_links(inv: dict, base_dir: Path, policy: LinkPolicy, *, manifest: LinkManifest | None = None) -> list[PlanItem]:
     toolbox_dir = inv.get("toolbox_dir")
     if not toolbox_dir:
         return []
@@ -98,6 +155,7 @@ def plan_links(inv: dict, base_dir: Path, policy: LinkPolicy) -> list[PlanItem]:
         raise ValueError("links_repo_root must be a list")
 
     plan: list[PlanItem] = []
+    claimed: list[Path] = []
     for it in items:
         item, error = _validate_link_item(it)
         if error:
@@ -109,111 +167,195 @@ def plan_links(inv: dict, base_dir: Path, policy: LinkPolicy) -> list[PlanItem]:
         target = str(item.get("target", Path(source).name))
         p = per_link_policy(item, policy)
         src = tb / source
-        dst = (base_dir / target).resolve()
+        dst = _link_target(base_dir, target)
 
-        src_error = _validate_source_exists(src, dst)
+        src_error = _validate_link_type(p, dst) or _validate_source_exists(src, dst) or _validate_no_overlap(dst, claimed)
         if src_error:
             plan.append(src_error)
             continue
+        claimed.append(dst)
 
-        if not dst.exists():
-            plan.append(PlanItem("ADD", str(dst), f"{p.type} from {src}"))
-            continue
-
-        if p.type == "symlink":
-            if dst.is_symlink() and dst.resolve() == src.resolve():
-                plan.append(PlanItem("NOOP", str(dst), "already linked"))
-            else:
-                plan.append(
-                    PlanItem(
-                        "UPDATE" if p.force else "CONFLICT",
-                        str(dst),
-                        "replace existing with symlink" if p.force else "existing differs",
-                    )
-                )
-        else:
-            same = False
-            try:
-                if src.is_file() and dst.is_file():
-                    same = src.stat().st_size == dst.stat().st_size
-            except OSError:
-                same = False
-            if same:
-                plan.append(PlanItem("NOOP", str(dst), "already copied (shallow match)"))
-            else:
-                plan.append(PlanItem("UPDATE" if p.force else "CONFLICT", str(dst), "copy update"))
-                if p.delete:
-                    msg = "delete extra files (rsync -a --delete)"
-                    plan.append(PlanItem("DELETE", str(dst), msg))
+        with trace.span("link.plan", target=str(dst), type=p.type):
+            plan.extend(_plan_link(src, dst, p, manifest))
 
     return plan
 
 
-def apply_links(inv: dict, base_dir: Path, policy: LinkPolicy) -> list[PlanItem]:
+def _manifest_check(src: Path, dst: Path, p: LinkPolicy, manifest: LinkManifest | None) -> tuple[bool, LinkPolicy]:
+    """(up to date, policy to use) for a copy-mode item with a manifest record.
+
+    A destination the manifest proves untouched only lags behind its source, so
+    overwriting it loses nothing: it is synced as if --force-links were given and
+    shows up as drift instead of a conflict. Local edits still conflict.
+    """
+    if manifest is None or p.type != "copy":
+        return False, p
+    state = manifest.status(src, dst, p)
+    if state == "source" and not p.force:
+        return False, replace(p, force=True)
+    return state == "current", p
+
+
+def _plan_link(src: Path, dst: Path, p: LinkPolicy, manifest: LinkManifest | None) -> list[PlanItem]:
+    current, p = _manifest_check(src, dst, p, manifest)
+    if current:
+        return [PlanItem("NOOP", str(dst), "unchanged since last apply")]
+    if not dst.exists() and not dst.is_symlink():
+        return [PlanItem("ADD", str(dst), f"{p.type} from {src}")]
+    if p.type == "symlink":
+        return [_plan_symlink(src, dst, p)]
+    return _plan_tree(src, dst, p)
+
+
+def _plan_symlink(src: Path, dst: Path, p: LinkPolicy) -> PlanItem:
+    if dst.is_symlink() and dst.resolve() == src.resolve():
+        return PlanItem("NOOP", str(dst), "already linked")
+    if p.force:
+        return PlanItem("UPDATE", str(dst), "replace existing with symlink")
+    return PlanItem("CONFLICT", str(dst), "existing differs")
+
+
+def _plan_tree(src: Path, dst: Path, p: LinkPolicy) -> list[PlanItem]:
+    """Copy- or hardlink-mode plan of an existing destination."""
+    hardlink = p.type == "hardlink"
+    changes = list(diff_path(src, dst, delete=p.delete, hardlink=hardlink))
+    if not changes:
+        return [PlanItem("NOOP", str(dst), "already linked" if hardlink else "already copied")]
+    # mode/mtime-only updates lose nothing, so they do not need --force-links
+    if not p.force and not all(c.meta for c in changes):
+        return [PlanItem("CONFLICT", str(dst), f"existing differs ({len(changes)} changes)")]
+    return [_change_item(dst, c, applied=False, link_type=p.type) for c in changes]
+
+
+def apply_links(
+    inv: dict,
+    base_dir: Path,
+    policy: LinkPolicy,
+    *,
+    manifest: LinkManifest | None = None,
+    jobs: int = 1,
+    transfer: Transfer | None = None,
+) -> list[PlanItem]:
+    """Apply links_repo_root; with ``jobs`` > 1 link items and file copies run on worker threads.
+
+    Validation and conflict detection happen in inventory order before any work is
+    submitted, and results are returned in that order regardless of ``jobs``.
+    With a ``transfer``, progress is reported per link item (and, throttled, per file)
+    and a cancellation raises ApplyCancelledError between files; items finished by then
+    are still recorded in the manifest. A target being created when the cancellation hits
+    is removed; one being updated keeps the files already replaced until the next apply.
+    """
     toolbox_dir = inv.get("toolbox_dir")
     if not toolbox_dir:
         return []
     tb = Path(str(toolbox_dir)).resolve()
 
     items = inv.get("links_repo_root") or []
-    out: list[PlanItem] = []
+    slots: list[list[PlanItem] | Future[list[PlanItem]]] = []
+    claimed: list[Path] = []
 
-    for it in items:
-        item, error = _validate_link_item(it)
-        if error:
-            continue
-        assert item is not None
-
-        source = str(item.get("source"))
-        target = str(item.get("target", Path(source).name))
-        p = per_link_policy(item, policy)
-        src = tb / source
-        dst = (base_dir / target).resolve()
-        dst.parent.mkdir(parents=True, exist_ok=True)
-
-        src_error = _validate_source_exists(src, dst)
-        if src_error:
-            out.append(src_error)
-            continue
-
-        if dst.exists() or dst.is_symlink():
-            if p.type == "symlink" and dst.is_symlink() and dst.resolve() == src.resolve():
-                out.append(PlanItem("NOOP", str(dst), "already linked"))
+    with worker_pool(jobs, "wtplan-link") as item_pool, worker_pool(jobs, "wtplan-copy") as file_pool:
+        for it in items:
+            item, error = _validate_link_item(it)
+            if error:
                 continue
-            if not p.force:
-                out.append(PlanItem("CONFLICT", str(dst), "existing differs (use --force-links)"))
+            assert item is not None
+
+            source = str(item.get("source"))
+            target = str(item.get("target", Path(source).name))
+            p = per_link_policy(item, policy)
+            src = tb / source
+            dst = _link_target(base_dir, target)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+
+            src_error = _validate_link_type(p, dst) or _validate_source_exists(src, dst) or _validate_no_overlap(dst, claimed)
+            if src_error:
+                slots.append([src_error])
                 continue
-            if dst.is_dir() and not dst.is_symlink():
-                shutil.rmtree(dst)
-            else:
-                dst.unlink(missing_ok=True)
+            claimed.append(dst)
 
-        if p.type == "symlink":
-            dst.symlink_to(src)
-            out.append(PlanItem("ADD", str(dst), f"symlink -> {src}"))
-        else:
-            if src.is_dir():
-                shutil.copytree(src, dst, dirs_exist_ok=True)
-                out.append(PlanItem("ADD", str(dst), "copied dir (rsync -a like)"))
-                if p.delete:
-                    _sync_delete_extra(src, dst)
-                    out.append(PlanItem("DELETE", str(dst), "deleted extras (rsync -a --delete)"))
-            else:
-                shutil.copy2(src, dst)
-                out.append(PlanItem("ADD", str(dst), "copied file"))
+            slots.append(item_pool.submit(_apply_link, src, dst, p, manifest, file_pool, transfer))
 
+        try:
+            out = [pi for applied in resolve(slots) for pi in applied]
+        finally:
+            if manifest is not None:
+                manifest.save()
     return out
 
 
-def _sync_delete_extra(src: Path, dst: Path) -> None:
-    src_entries = {p.name for p in src.iterdir()} if src.exists() else set()
-    for p in dst.iterdir():
-        if p.name not in src_entries:
-            if p.is_dir():
-                shutil.rmtree(p)
+def _validate_no_overlap(dst: Path, claimed: list[Path]) -> PlanItem | None:
+    """Validate dst does not overlap the target of an earlier link item."""
+    for other in claimed:
+        if dst == other or dst.is_relative_to(other) or other.is_relative_to(dst):
+            return PlanItem("CONFLICT", str(dst), f"overlaps link target: {other}")
+    return None
+
+
+def _apply_link(
+    src: Path,
+    dst: Path,
+    p: LinkPolicy,
+    manifest: LinkManifest | None,
+    file_pool: Executor | None = None,
+    transfer: Transfer | None = None,
+) -> list[PlanItem]:
+    with trace.span("link.apply", target=str(dst), type=p.type):
+        return _apply_link_item(src, dst, p, manifest, file_pool, transfer)
+
+
+def _apply_link_item(
+    src: Path,
+    dst: Path,
+    p: LinkPolicy,
+    manifest: LinkManifest | None,
+    file_pool: Executor | None,
+    transfer: Transfer | None,
+) -> list[PlanItem]:
+    if transfer is not None:
+        transfer.check()
+    current, p = _manifest_check(src, dst, p, manifest)
+    if current:
+        applied = [PlanItem("NOOP", str(dst), "unchanged since last apply")]
+    else:
+        applied = _apply_symlink(src, dst, p) if p.type == "symlink" else _apply_copy(src, dst, p, file_pool, transfer)
+        if manifest is not None and not any(a.kind == "CONFLICT" for a in applied):
+            # hardlinks are checked by inode identity, which is as cheap as the manifest
+            if p.type == "copy":
+                manifest.record(src, dst, p)
             else:
-                p.unlink(missing_ok=True)
+                manifest.forget(dst)
+    if transfer is not None:
+        transfer.report(str(dst), applied[0].detail if len(applied) == 1 else f"{len(applied)} changes applied")
+    return applied
+
+
+def _apply_symlink(src: Path, dst: Path, p: LinkPolicy) -> list[PlanItem]:
+    if dst.exists() or dst.is_symlink():
+        if dst.is_symlink() and dst.resolve() == src.resolve():
+            return [PlanItem("NOOP", str(dst), "already linked")]
+        if not p.force:
+            return [PlanItem("CONFLICT", str(dst), "existing differs (use --force-links)")]
+        if dst.is_dir() and not dst.is_symlink():
+            shutil.rmtree(dst)
         else:
-            sp = src / p.name
-            if sp.is_dir() and p.is_dir():
-                _sync_delete_extra(sp, p)
+            dst.unlink(missing_ok=True)
+    dst.symlink_to(src)
+    return [PlanItem("ADD", str(dst), f"symlink -> {src}")]
+
+
+def _apply_copy(
+    src: Path, dst: Path, p: LinkPolicy, file_pool: Executor | None = None, transfer: Transfer | None = None
+) -> list[PlanItem]:
+    hardlink = p.type == "hardlink"
+    unchanged = "already linked" if hardlink else "already copied"
+    if not p.force and (dst.exists() or dst.is_symlink()):
+        pending = list(diff_path(src, dst, delete=p.delete, hardlink=hardlink))
+        if not pending:
+            return [PlanItem("NOOP", str(dst), unchanged)]
+        if not all(c.meta for c in pending):
+            return [PlanItem("CONFLICT", str(dst), "existing differs (use --force-links)")]
+    changes = sync_path(src, dst, delete=p.delete, executor=file_pool, transfer=transfer, hardlink=hardlink)
+    if not changes:
+        return [PlanItem("NOOP", str(dst), unchanged)]
+    return [_change_item(dst, c, applied=True, link_type=p.type) for c in changes]
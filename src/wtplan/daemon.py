@@ -0,0 +1,135 @@
+"""Optional long-lived server keeping the inventory, workspace index and toolbox digests warm.
+
+One JSON request per connection on ``<base_dir>/.wtplan.sock``; answered by the
+same :mod:`wtplan.tools` functions the CLI runs in-process, so results are
+identical. The inventory, index and digest caches each revalidate with one
+stat() per request, so edits to ``.wtplan.yml`` and state saved by other
+processes are picked up without restarting. Link sources are re-scanned (stat
+only) per ``plan``; that scan is what detects toolbox edits, so it is not cached.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from . import index, tools
+from .client import PROTOCOL_VERSION, socket_path
+from .digests import digest_cache_path, load_digests_cached
+from .inventory import load_inventory_cached
+from .tools import WorkspaceMode
+
+
+class DaemonRunningError(RuntimeError):
+    """Another daemon already serves this directory."""
+
+
+def _op_path(args: dict[str, Any]) -> dict[str, Any]:
+    return tools.workspace_location(WorkspaceMode(args["mode"]), args["identifier"], int(args["issue_iid"]))
+
+
+def _op_plan(args: dict[str, Any]) -> dict[str, Any]:
+    return tools.plan(args.get("workspace_id"), bool(args.get("all_workspaces")))
+
+
+def _op_list(args: dict[str, Any]) -> dict[str, Any]:
+    return tools.list_workspaces()
+
+
+def _op_ping(args: dict[str, Any]) -> dict[str, Any]:
+    return {"pid": os.getpid()}
+
+
+OPS: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    "path": _op_path,
+    "plan": _op_plan,
+    "list": _op_list,
+    "ping": _op_ping,
+}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:  # liveness probe (see _claim_socket): nothing to answer
+            return
+        try:
+            msg = json.loads(line)
+            reply = {"ok": True, "result": self.server.dispatch(msg)}
+        except Exception as e:  # reported to the client, which then runs the command in-process
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+            self.wfile.write(json.dumps(reply).encode())
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, base_dir: Path) -> None:
+        self.base_dir = base_dir.resolve()
+        self.path = socket_path(self.base_dir)
+        _claim_socket(self.path)
+        super().__init__(str(self.path), _Handler)
+        os.chmod(self.path, 0o600)
+
+    def dispatch(self, msg: dict[str, Any]) -> dict[str, Any]:
+        if msg.get("v") != PROTOCOL_VERSION:
+            raise ValueError(f"protocol version {msg.get('v')!r} != {PROTOCOL_VERSION}")
+        if Path(msg.get("cwd", "")) != self.base_dir:
+            raise ValueError(f"daemon serves {self.base_dir}, not {msg.get('cwd')}")
+        op = msg.get("op")
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"pid": os.getpid()}
+        if op not in OPS:
+            raise ValueError(f"unknown op: {op!r}")
+        return OPS[op](msg.get("args") or {})
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+
+
+def _claim_socket(path: Path) -> None:
+    """Remove a stale socket left by a crashed daemon; refuse if one is still listening."""
+    if not path.exists():
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            path.unlink()
+            return
+    raise DaemonRunningError(f"a wtplan daemon is already listening on {path}")
+
+
+def serve(base_dir: Path) -> None:
+    """Run the daemon for ``base_dir`` in the foreground until SIGTERM/SIGINT or a shutdown request."""
+    os.chdir(base_dir)
+    server = DaemonServer(base_dir)
+    inv_path = server.base_dir / ".wtplan.yml"
+    with contextlib.suppress(FileNotFoundError):
+        load_inventory_cached(inv_path)  # warm the caches before the first request
+    index.load_index(inv_path)
+    load_digests_cached(digest_cache_path(inv_path))
+
+    def _stop(signum: int, frame: object) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .sync import file_digest
+
+DIGESTS_VERSION = 1
+DIGESTS_FILE = ".wtplan-digests.json"
+
+# entries younger than this may still be written within the same mtime tick; never cached
+RACY_WINDOW_NS = 2_000_000_000
+
+# entry per file path: [dev, ino, size, mtime_ns, digest]
+StatKey = tuple[int, int, int, int]
+
+
+def digest_cache_path(inv_path: Path) -> Path:
+    """Digest cache location: beside the inventory, shared by every workspace of it."""
+    return inv_path.with_name(DIGESTS_FILE)
+
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _file_stamp(path: Path | None) -> tuple[int, int, int] | None:
+    """(mtime_ns, size, inode) of the cache file; None when it does not exist (yet)."""
+    try:
+        st = path.stat() if path is not None else None
+    except FileNotFoundError:
+        return None
+    return None if st is None else (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class DigestCache:
+    """On-disk content digests of toolbox files, keyed by path and (dev, inode, size, mtime_ns).
+
+    An entry is only used while the file's stat key is unchanged, so the cache
+    never needs explicit invalidation; files modified within the last couple of
+    seconds are hashed but not cached (same-tick rewrites would keep their key).
+    """
+
+    def __init__(self, path: Path | None, entries: dict[str, list] | None = None) -> None:
+        self.path = path
+        self._entries = entries or {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stamp = _file_stamp(path)
+        self.hashed = 0
+
+    @classmethod
+    def load(cls, path: Path | None) -> DigestCache:
+        stamp = _file_stamp(path)
+        cache = cls(path, _read(path) if path is not None else {})
+        cache._stamp = stamp  # taken before reading, so a concurrent rewrite is picked up by refresh()
+        return cache
+
+    def refresh(self) -> None:
+        """Merge entries another process saved since this cache last read or wrote the file (one stat() when unchanged)."""
+        stamp = _file_stamp(self.path)
+        with self._lock:
+            if stamp == self._stamp:
+                return
+        assert self.path is not None
+        entries = _read(self.path)
+        with self._lock:
+            self._entries = {**entries, **self._entries}
+            self._stamp = stamp
+
+    def digest(self, file: Path) -> str:
+        st = file.stat()
+        key = _stat_key(st)
+        with self._lock:
+            entry = self._entries.get(str(file))
+        if entry is not None and tuple(entry[:4]) == key:
+            return entry[4]
+        value = file_digest(file)
+        with self._lock:
+            self.hashed += 1
+            if time.time_ns() - st.st_mtime_ns >= RACY_WINDOW_NS:
+                self._entries[str(file)] = [*key, value]
+                self._dirty = True
+        return value
+
+    def save(self) -> None:
+        """Merge into the file on disk (last writer wins per entry), dropping entries of deleted files."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            merged = {**_read(self.path), **self._entries}
+            self._dirty = False
+        merged = {p: e for p, e in merged.items() if os.path.lexists(p)}
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"version": DIGESTS_VERSION, "files": merged}), encoding="utf-8")
+        os.replace(tmp, self.path)
+        with self._lock:
+            # entries added by other threads meanwhile are kept; those of deleted files are dropped
+            current = {**merged, **self._entries}
+            self._entries = {p: e for p, e in current.items() if p in merged or os.path.lexists(p)}
+            self._stamp = _file_stamp(self.path)
+
+
+_warm_lock = threading.Lock()
+_warm: dict[Path, DigestCache] = {}
+
+
+def load_digests_cached(path: Path) -> DigestCache:
+    """Per-process :class:`DigestCache` for ``path``, kept in memory by long-lived processes (MCP server, daemon).
+
+    Entries validate themselves by stat key, so the instance never goes stale; it is
+    only refreshed from disk when another process has saved the file since.
+    """
+    with _warm_lock:
+        cache = _warm.get(path)
+        if cache is None:
+            _warm[path] = cache = DigestCache.load(path)
+            return cache
+    cache.refresh()
+    return cache
+
+
+def _read(path: Path) -> dict[str, list]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != DIGESTS_VERSION:
+        return {}
+    return dict(data.get("files") or {})
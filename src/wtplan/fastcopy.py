@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int), Linux btrfs/xfs/bcachefs
+COPY_CHUNK = 1 << 30
+
+# errnos meaning "this kernel/filesystem can't do it", never a real I/O failure
+_UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF, errno.EPERM}
+
+
+def _reflink(src_fd: int, dst_fd: int, size: int) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return True
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+    offset = 0
+    try:
+        while offset < size:
+            n = os.copy_file_range(src_fd, dst_fd, min(size - offset, COPY_CHUNK), offset, offset)
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if e.errno in _UNSUPPORTED and offset == 0:
+            return False
+        raise
+    return offset == size
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        return False
+    offset = 0
+    try:
+        while offset < size:
+            n = os.sendfile(dst_fd, src_fd, offset, min(size - offset, COPY_CHUNK))
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if e.errno in _UNSUPPORTED and offset == 0:
+            return False
+        raise
+    return offset == size
+
+
+def _userspace(src_fd: int, dst_fd: int, size: int) -> bool:
+    with open(src_fd, "rb", closefd=False) as fsrc, open(dst_fd, "wb", closefd=False) as fdst:
+        shutil.copyfileobj(fsrc, fdst)
+    return True
+
+
+STRATEGIES = (
+    ("reflink", _reflink),
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _sendfile),
+    ("copy", _userspace),
+)
+
+
+def copy_data(src: Path, dst: Path) -> str:
+    """Copy file content from ``src`` into a new ``dst`` and return the strategy used.
+
+    Strategies are tried cheapest first: a copy-on-write clone (FICLONE), in-kernel
+    copy_file_range, sendfile, then a userspace copy. A strategy that fails before
+    writing anything hands over to the next one.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size
+        for name, strategy in STRATEGIES:
+            if strategy(src_fd, dst_fd, size):
+                return name
+            os.ftruncate(dst_fd, 0)
+            fdst.seek(0)
+    raise OSError(errno.EIO, f"no copy strategy succeeded: {src}")  # pragma: no cover
+
+
+def copy_file(src: Path, dst: Path) -> str:
+    """Copy content, mode and times (like shutil.copy2) and return the strategy used."""
+    strategy = copy_data(src, dst)
+    shutil.copystat(src, dst)
+    return strategy
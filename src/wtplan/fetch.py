@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+
+from .git import fetch
+
+DEFAULT_FETCH_TTL = 300.0
+LAST_FETCH_FILE = "wtplan-last-fetch"
+
+
+def fetch_ttl(inv: dict) -> float:
+    """Freshness TTL in seconds from the inventory ``fetch_ttl`` setting."""
+    ttl = inv.get("fetch_ttl")
+    return DEFAULT_FETCH_TTL if ttl is None else float(ttl)
+
+
+def last_fetch(bare: Path) -> float | None:
+    """Time of the last recorded fetch (or clone) of ``bare``, shared across processes."""
+    try:
+        return float((bare / LAST_FETCH_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def record_fetch(bare: Path, when: float | None = None) -> None:
+    tmp = bare / f"{LAST_FETCH_FILE}.{os.getpid()}.tmp"
+    tmp.write_text(repr(time.time() if when is None else when), encoding="utf-8")
+    os.replace(tmp, bare / LAST_FETCH_FILE)
+
+
+class FetchScheduler:
+    """Deduplicates fetches of shared bare repositories.
+
+    Concurrent requests for the same bare repo are merged into one ``git fetch``,
+    and a repo fetched less than ``ttl`` seconds ago (by any process) is skipped.
+    """
+
+    def __init__(self, fetcher: Callable[[Path], None] = fetch, clock: Callable[[], float] = time.time) -> None:
+        self._fetcher = fetcher
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._inflight: dict[Path, Future[None]] = {}
+
+    def fetch(self, bare: Path, *, ttl: float = DEFAULT_FETCH_TTL) -> str:
+        """Fetch ``bare`` unless fresh; return "fetched", "joined" or "fresh"."""
+        key = bare.resolve()
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                last = last_fetch(key)
+                if last is not None and self._clock() - last < ttl:
+                    return "fresh"
+                pending = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            pending.result()
+            return "joined"
+        try:
+            self._fetcher(key)
+            record_fetch(key, self._clock())
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(None)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return "fetched"
+
+
+scheduler = FetchScheduler()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .core import PlanItem, plan_links, workspace_repos
+from .inventory import InventoryPaths
+from .manifest import LinkManifest, SourceCache, link_manifest_path
+from .policy import LinkPolicy
+from .worktree import is_worktree
+
+
+@dataclass
+class Workspace:
+    """A workspace directory under ``workspaces_dir`` and/or an entry of the workspace index."""
+
+    id: str
+    path: Path  # primary worktree
+    key: str | None = None
+    repos: list[str] = field(default_factory=list)
+    exists: bool = True
+
+
+def _primary_alias(ws_id: str, dirs: list[str]) -> str | None:
+    """Primary repo of an unindexed workspace: the directory matching the ``<REPO>_ISSUE_<iid>`` prefix."""
+    prefix = ws_id.partition("_ISSUE_")[0]
+    return next((d for d in dirs if d.upper() == prefix), dirs[0] if dirs else None)
+
+
+def _expected_repos(inv: dict, entry: dict[str, Any]) -> list[str]:
+    mode = entry.get("mode")
+    try:
+        if mode == "preset":
+            return workspace_repos(inv, str(entry.get("preset")), None)
+        if mode == "repo":
+            return workspace_repos(inv, None, str(entry.get("repo")))
+    except KeyError:
+        pass
+    return list(entry.get("repos") or {})
+
+
+def scan_workspaces(inv: dict, paths: InventoryPaths, entries: dict[str, dict[str, Any]]) -> list[Workspace]:
+    """Workspaces on disk plus indexed ones whose directory is gone, ordered by id.
+
+    One scandir of ``workspaces_dir`` and one per workspace directory.
+    """
+    by_id: dict[str, tuple[str, dict[str, Any]]] = {}
+    for key, entry in entries.items():
+        if isinstance(entry, dict) and entry.get("path"):
+            by_id[Path(entry["path"]).parent.name] = (key, entry)
+
+    found: dict[str, Workspace] = {}
+    try:
+        with os.scandir(paths.workspaces_dir) as it:
+            ws_dirs = [e for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith(".")]
+    except FileNotFoundError:
+        ws_dirs = []
+    for d in ws_dirs:
+        with os.scandir(d.path) as it:
+            repo_dirs = sorted(e.name for e in it if e.is_dir(follow_symlinks=False) and not e.name.startswith("."))
+        key, entry = by_id.get(d.name, (None, {}))
+        if entry:
+            primary = Path(entry["path"]).name
+            repos = _expected_repos(inv, entry)
+        else:
+            primary = _primary_alias(d.name, repo_dirs) or ""
+            repos = repo_dirs
+        found[d.name] = Workspace(d.name, Path(d.path) / primary, key, repos)
+
+    for ws_id, (key, entry) in by_id.items():
+        if ws_id not in found:
+            found[ws_id] = Workspace(ws_id, Path(entry["path"]), key, _expected_repos(inv, entry), exists=False)
+    return [found[k] for k in sorted(found)]
+
+
+def _repo_state(path: Path) -> str:
+    if is_worktree(path):
+        return "worktree"
+    return "not a worktree" if path.exists() else "missing"
+
+
+def plan_workspace(inv: dict, ws: Workspace, policy: LinkPolicy, sources: SourceCache) -> dict[str, Any]:
+    """Worktree states and links_repo_root plan of one workspace."""
+    repos = {r: _repo_state(ws.path.parent / r) for r in ws.repos}
+    if not ws.exists or not ws.path.is_dir():
+        links = [PlanItem("CONFLICT", str(ws.path), "primary worktree missing")]
+    else:
+        manifest = LinkManifest.load(link_manifest_path(ws.path), sources)
+        links = plan_links(inv, ws.path, policy, manifest=manifest)
+    return {
+        "id": ws.id,
+        "key": ws.key,
+        "path": str(ws.path),
+        "repos": repos,
+        "links_repo_root": [p.__dict__ for p in links],
+    }
+
+
+def status(planned: dict[str, Any]) -> str:
+    """ok | drift (changes to apply, repos missing) | conflict (needs attention)."""
+    kinds = {i["kind"] for i in planned["links_repo_root"]}
+    states = set(planned["repos"].values())
+    if "CONFLICT" in kinds or "not a worktree" in states:
+        return "conflict"
+    if kinds - {"NOOP"} or "missing" in states:
+        return "drift"
+    return "ok"
+
+
+def summarize(planned: dict[str, Any]) -> dict[str, Any]:
+    """Compact per-workspace line for the fleet view."""
+    return {
+        "id": planned["id"],
+        "key": planned["key"],
+        "status": status(planned),
+        "repos": dict(Counter(planned["repos"].values())),
+        "links": dict(sorted(Counter(i["kind"] for i in planned["links_repo_root"]).items())),
+    }
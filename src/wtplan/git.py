@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+from . import trace
+
+_GIT_ENV = {"GIT_TERMINAL_PROMPT": "0", "LC_ALL": "C"}
+
+
+class GitError(RuntimeError):
+    """A git command exited non-zero."""
+
+    def __init__(self, args: list[str], returncode: int, stderr: str) -> None:
+        self.args_ = args
+        self.returncode = returncode
+        self.stderr = stderr.strip()
+        super().__init__(f"git {' '.join(args)}: {self.stderr or f'exit {returncode}'}")
+
+
+def _subcommand(args: list[str]) -> str:
+    """First non-option argument, skipping the values of ``-c``, ``-C`` and ``--git-dir``."""
+    it = iter(args)
+    for a in it:
+        if a in ("-c", "--git-dir", "-C"):
+            next(it, None)
+        elif not a.startswith("-"):
+            return a
+    return "?"
+
+
+def run_git(args: list[str], cwd: Path | None = None, *, check: bool = True) -> str:
+    """Run git non-interactively and return stdout."""
+    with trace.span(f"git {_subcommand(args)}"):
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            env={**os.environ, **_GIT_ENV},
+            check=False,
+        )
+    if check and proc.returncode != 0:
+        raise GitError(args, proc.returncode, proc.stderr)
+    return proc.stdout
+
+
+def ref_exists(git_dir: Path, ref: str) -> bool:
+    proc = subprocess.run(
+        ["git", "--git-dir", str(git_dir), "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+        capture_output=True,
+        env={**os.environ, **_GIT_ENV},
+        check=False,
+    )
+    return proc.returncode == 0
+
+
+def ensure_bare(url: str, bare: Path, clone_filter: str | None = None) -> bool:
+    """Clone ``url`` as a bare repository at ``bare`` unless it exists; return True if cloned.
+
+    The fetch refspec is switched to remote-tracking refs so that fetching never
+    touches the local branches checked out by worktrees. ``clone_filter`` makes it a
+    partial clone (e.g. ``blob:none``); missing objects are fetched on demand.
+    """
+    if (bare / "HEAD").exists():
+        return False
+    bare.parent.mkdir(parents=True, exist_ok=True)
+    args = ["clone", "--bare", "--quiet"]
+    if clone_filter:
+        args.append(f"--filter={clone_filter}")
+    run_git([*args, url, str(bare)])
+    run_git(["--git-dir", str(bare), "config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*"])
+    fetch(bare)
+    return True
+
+
+def fetch(bare: Path) -> None:
+    run_git(["--git-dir", str(bare), "fetch", "--quiet", "--prune", "origin"])
+
+
+def default_branch(bare: Path) -> str:
+    """Branch the remote HEAD pointed to at clone time."""
+    return run_git(["--git-dir", str(bare), "symbolic-ref", "--short", "HEAD"]).strip()
+
+
+def resolve_base(bare: Path, base: str | None) -> str:
+    """Start point for a new issue branch: ``origin/<base>`` when it exists, else ``base`` verbatim."""
+    name = base or default_branch(bare)
+    remote = f"origin/{name}"
+    return remote if ref_exists(bare, remote) else name
+
+
+def add_worktree(bare: Path, path: Path, branch: str, base: str | None, sparse: tuple[str, ...] = ()) -> str:
+    """Create a worktree of ``bare`` at ``path`` on ``branch``; return the start point used.
+
+    An existing local ``branch`` is checked out as is, otherwise it is created from ``base``.
+    With ``sparse`` cone patterns only those directories (plus top-level files) are
+    checked out; the sparse-checkout config is per worktree.
+    """
+    run_git(["--git-dir", str(bare), "worktree", "prune"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    add = ["--git-dir", str(bare), "worktree", "add", "--quiet"]
+    if sparse:
+        add.append("--no-checkout")
+    if ref_exists(bare, f"refs/heads/{branch}"):
+        start = branch
+        run_git([*add, str(path), branch])
+    else:
+        start = resolve_base(bare, base)
+        run_git([*add, "--no-track", "-b", branch, str(path), start])
+    if sparse:
+        run_git(["sparse-checkout", "set", "--cone", *sparse], cwd=path)
+        run_git(["checkout", "--quiet", branch], cwd=path)
+    return start
+
+
+def is_worktree(path: Path) -> bool:
+    return (path / ".git").exists()
+
+
+def status_porcelain(path: Path) -> tuple[dict[str, str], list[str]]:
+    """``git status --porcelain=v2 --branch`` of a worktree: (branch headers, changed paths).
+
+    Untracked paths are included (collapsed per directory, with a trailing "/"). The
+    index is not refreshed on disk, so checking does not look like activity to ``gc``.
+    """
+    out = run_git(["--no-optional-locks", "-c", "core.quotePath=false", "status", "--porcelain=v2", "--branch"], cwd=path)
+    headers: dict[str, str] = {}
+    paths: list[str] = []
+    for line in out.splitlines():
+        if line.startswith("# "):
+            key, _, value = line[2:].partition(" ")
+            headers[key] = value
+        elif line.startswith(("? ", "! ")):
+            paths.append(line[2:])
+        elif line.startswith("1 "):
+            paths.append(line.split(" ", 8)[8])
+        elif line.startswith("2 "):
+            paths.append(line.split(" ", 9)[9].split("\t")[0])
+        elif line.startswith("u "):
+            paths.append(line.split(" ", 10)[10])
+    return headers, paths
+
+
+def ahead_behind(path: Path, branch: str) -> tuple[int, int] | None:
+    """Commits of HEAD not on ``origin/<branch>`` and vice versa; None when the remote branch does not exist."""
+    remote = f"refs/remotes/origin/{branch}"
+    if run_git(["for-each-ref", "--count=1", remote], cwd=path).strip() == "":
+        return None
+    ahead, behind = run_git(["rev-list", "--left-right", "--count", f"HEAD...{remote}"], cwd=path).split()
+    return int(ahead), int(behind)
+
+
+def unpublished_commits(path: Path) -> int:
+    """Commits reachable from HEAD that are on no remote-tracking branch."""
+    return int(run_git(["rev-list", "--count", "HEAD", "--not", "--remotes"], cwd=path).strip())
+
+
+def remove_worktree(bare: Path, path: Path) -> None:
+    """Remove a worktree; callers have already checked it is safe, so git's own dirty check is bypassed."""
+    run_git(["--git-dir", str(bare), "worktree", "remove", "--force", str(path)])
+
+
+def prune_worktrees(bare: Path) -> None:
+    run_git(["--git-dir", str(bare), "worktree", "prune"])
+
+
+def gc_auto(bare: Path) -> None:
+    run_git(["--git-dir", str(bare), "gc", "--auto", "--quiet"])
+
+
+def merge_state(path: Path, target: str) -> str:
+    """How HEAD of a worktree relates to ``target`` (e.g. ``origin/main``).
+
+    "merged": HEAD is reachable from ``target`` through a merge (not on its first-parent line);
+    "untouched": HEAD is a commit of ``target``'s own history, i.e. the branch has no work of its own;
+    "open": HEAD has commits ``target`` does not contain.
+    """
+    if int(run_git(["rev-list", "--count", f"{target}..HEAD"], cwd=path)):
+        return "open"
+    distance = run_git(["rev-list", "--first-parent", "--count", target, "^HEAD"], cwd=path).strip()
+    on_line = run_git(["rev-parse", f"{target}~{distance}", "HEAD"], cwd=path).split()
+    return "untouched" if on_line[0] == on_line[1] else "merged"
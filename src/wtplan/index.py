@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .inventory import inventory_lock
+
+INDEX_VERSION = 1
+INDEX_FILE = ".wtplan-index.json"
+
+# workspace key -> entry; the runtime file holds {"version": INDEX_VERSION, "workspaces": {...}}
+Entries = dict[str, dict[str, Any]]
+
+
+def index_path(inv_path: Path) -> Path:
+    """Workspace index location: a runtime file beside the inventory, which it never rewrites."""
+    return inv_path.with_name(INDEX_FILE)
+
+
+def workspace_key(mode: str, identifier: str, iid: int) -> str:
+    """Key of a workspace in the workspace index."""
+    return f"{mode}/{identifier}/{iid}"
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat(timespec="seconds")
+
+
+def _file_stamp(path: Path) -> tuple[int, int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read(path: Path, inv: dict | None) -> Entries:
+    """Entries of the index file; before it exists, the ``workspaces`` section older versions kept in the inventory."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        legacy = (inv or {}).get("workspaces")
+        return copy.deepcopy(legacy) if isinstance(legacy, dict) else {}
+    except ValueError:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return dict(data.get("workspaces") or {})
+
+
+_cache_lock = threading.Lock()
+_cache: dict[Path, tuple[tuple[int, int, int], Entries]] = {}
+
+
+def load_index(inv_path: Path, inv: dict | None = None) -> Entries:
+    """Index entries for read-only use, cached per process and revalidated with one stat()."""
+    path = index_path(inv_path)
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return _read(path, inv)
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    entries = _read(path, inv)
+    with _cache_lock:
+        _cache[path] = (stamp, entries)
+    return entries
+
+
+@contextmanager
+def update_index(inv_path: Path, inv: dict | None = None) -> Iterator[Entries]:
+    """Locked read-modify-write of the index; the yielded entries are written back atomically on exit if changed."""
+    path = index_path(inv_path)
+    with inventory_lock(inv_path):
+        entries = _read(path, inv)
+        before = copy.deepcopy(entries)
+        yield entries
+        if entries == before:
+            return
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "workspaces": entries}, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def lookup(entries: Entries, key: str) -> dict[str, Any] | None:
+    entry = entries.get(key)
+    return entry if isinstance(entry, dict) else None
+
+
+def record_apply(
+    entries: Entries,
+    key: str,
+    *,
+    mode: str,
+    identifier: str,
+    iid: int,
+    ws_id: str,
+    path: Path,
+    repos: dict[str, Path],
+    items: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Insert or refresh the index entry of a workspace after an apply; returns the entry."""
+    previous = lookup(entries, key) or {}
+    kinds = Counter(str(i.get("kind")) for i in items)
+    entry = {
+        "mode": mode,
+        mode: identifier,
+        "issue_iid": iid,
+        "id": ws_id,
+        "path": str(path),
+        "repos": {alias: str(p) for alias, p in repos.items()},
+        "created": previous.get("created") or _now(),
+        "last_apply": {
+            "at": _now(),
+            "status": "conflict" if kinds.get("CONFLICT") else "ok",
+            "counts": dict(sorted(kinds.items())),
+        },
+    }
+    entries[key] = entry
+    return entry
+
+
+def forget(entries: Entries, key: str) -> bool:
+    return entries.pop(key, None) is not None
+
+
+def list_workspaces(entries: Entries) -> list[dict[str, Any]]:
+    """Indexed workspaces as ``{"key": ..., **entry}``, ordered by key."""
+    return [{"key": k, **v} for k, v in sorted(entries.items()) if isinstance(v, dict)]
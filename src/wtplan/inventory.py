@@ -1,11 +1,30 @@
 from __future__ import annotations
 
+import copy
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+from . import trace
+from .policy import LinkPolicy, effective_policy
+
+# libyaml C loader when PyYAML was built with it (reads are on every command). Writes
+# always use the pure-Python dumper: the C emitter formats some keys (e.g. the empty
+# string) differently, and the committed inventory must not depend on how PyYAML was built.
+YAML_LOADER: type = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER: type = yaml.SafeDumper
+
 DEFAULT_INVENTORY: dict[str, Any] = {
     "version": 1,
     "root": ".",
@@ -17,7 +36,6 @@ DEFAULT_INVENTORY: dict[str, Any] = {
     },
     "presets": {},
     "links_repo_root": [],
-    "workspaces": {},
 }
 
 
@@ -31,15 +49,92 @@ class InventoryPaths:
 def load_inventory(path: Path) -> dict[str, Any]:
     if not path.exists():
         raise FileNotFoundError(path)
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    with trace.span("yaml.load") as sp:
+        text = path.read_text(encoding="utf-8")
+        sp.add(bytes=len(text))
+        data = yaml.load(text, Loader=YAML_LOADER)
     if not isinstance(data, dict):
         raise ValueError("Inventory must be a mapping")
     return data
 
 
-def write_inventory(path: Path, data: dict[str, Any]) -> None:
-    text = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
-    path.write_text(text, encoding="utf-8")
+def inventory_stamp(path: Path) -> tuple[int, int, int]:
+    """(mtime_ns, size, inode) of the inventory file; changes whenever it is rewritten."""
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class InventoryConflictError(RuntimeError):
+    """The inventory file changed between read and write."""
+
+
+def write_inventory(path: Path, data: dict[str, Any], *, expected_stamp: tuple[int, int, int] | None = None) -> None:
+    """Atomically replace the inventory: write a temp sibling, fsync, then os.replace.
+
+    With ``expected_stamp`` (from :func:`inventory_stamp` at read time) the write is
+    refused with InventoryConflictError if the file was rewritten in between.
+    """
+    text = yaml.dump(data, Dumper=YAML_DUMPER, sort_keys=False, allow_unicode=True)
+    try:
+        mode = path.stat().st_mode & 0o7777
+        stamp = inventory_stamp(path)
+    except FileNotFoundError:
+        mode = stamp = None
+    if expected_stamp is not None and stamp != expected_stamp:
+        raise InventoryConflictError(f"{path} was modified concurrently; re-read and retry")
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    _fsync_dir(path.parent)
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - platforms without directory fds
+        return
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def inventory_lock(path: Path) -> Iterator[None]:
+    """Advisory exclusive lock (flock on ``<inventory>.lock``) shared by CLI and MCP processes."""
+    if fcntl is None:  # pragma: no cover - non-POSIX
+        yield
+        return
+    fd = os.open(path.with_name(path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def update_inventory(path: Path) -> Iterator[dict[str, Any]]:
+    """Locked read-modify-write of the inventory; the yielded dict is written back on exit if changed."""
+    with inventory_lock(path):
+        stamp = inventory_stamp(path)
+        data = load_inventory(path)
+        before = copy.deepcopy(data)
+        yield data
+        if data != before:
+            write_inventory(path, data, expected_stamp=stamp)
 
 
 def resolve_paths(inv: dict[str, Any], base_dir: Path) -> InventoryPaths:
@@ -49,3 +144,55 @@ def resolve_paths(inv: dict[str, Any], base_dir: Path) -> InventoryPaths:
         bare_dir=(root / str(inv.get("bare_dir", "bare"))).resolve(),
         workspaces_dir=(root / str(inv.get("workspaces_dir", "worktrees"))).resolve(),
     )
+
+
+@dataclass(frozen=True)
+class CachedInventory:
+    """Parsed inventory plus values derived from it; ``data`` is shared and must not be mutated."""
+
+    data: dict[str, Any]
+    paths: InventoryPaths
+    policy: LinkPolicy
+    stamp: tuple[int, int, int]
+
+
+class InventoryCache:
+    """Per-process cache of parsed inventories, revalidated with one stat() per lookup."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[Path, CachedInventory] = {}
+
+    def get(self, path: Path) -> CachedInventory:
+        try:
+            stamp = inventory_stamp(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(path, None)
+            raise FileNotFoundError(path) from None
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        data = load_inventory(path)
+        cached = CachedInventory(
+            data=data,
+            paths=resolve_paths(data, path.parent),
+            policy=effective_policy(data, cli_force=False, cli_delete=False),
+            stamp=stamp,
+        )
+        with self._lock:
+            self._entries[path] = cached
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+inventory_cache = InventoryCache()
+
+
+def load_inventory_cached(path: Path) -> CachedInventory:
+    """Cached :func:`load_inventory` for long-lived processes (MCP server); read-only use."""
+    return inventory_cache.get(path)
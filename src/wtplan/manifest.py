@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import json
+import os
+import stat
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from . import trace
+from .digests import DigestCache
+from .policy import LinkPolicy
+from .sync import file_digest
+
+MANIFEST_VERSION = 3
+MANIFEST_SUFFIX = ".wtplan-links.json"
+
+# Fingerprint entries per relative path (destinations are recorded without the digest):
+#   ["d"]                                          directory
+#   ["l", target]                                  symlink
+#   ["f", size, mtime_ns, dev, ino, mode, digest]  regular file (mode is S_IMODE)
+Fingerprint = dict[str, list[Any]]
+
+
+def link_manifest_path(ws_path: Path) -> Path:
+    """Manifest location for a worktree: a sibling file under the workspace directory."""
+    return ws_path.parent / f".{ws_path.name}{MANIFEST_SUFFIX}"
+
+
+def _join(rel: str, name: str) -> str:
+    return name if rel == "." else f"{rel}/{name}"
+
+
+def _stat_entry(path: Path, st: os.stat_result) -> list[Any]:
+    if stat.S_ISDIR(st.st_mode):
+        return ["d"]
+    if stat.S_ISLNK(st.st_mode):
+        return ["l", os.readlink(path)]
+    return ["f", st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino, stat.S_IMODE(st.st_mode)]
+
+
+def _scan(root: Path, root_st: os.stat_result) -> Fingerprint:
+    out: Fingerprint = {".": _stat_entry(root, root_st)}
+    if out["."][0] != "d":
+        return out
+    stack = [(root, ".")]
+    while stack:
+        d, rel = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                child = _join(rel, e.name)
+                st = e.stat(follow_symlinks=False)
+                out[child] = _stat_entry(Path(e.path), st)
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append((Path(e.path), child))
+    trace.count(entries=len(out))
+    return out
+
+
+def scan_source(src: Path) -> Fingerprint:
+    """Stat-only scan of a link source (the root is followed, nested symlinks are not)."""
+    return _scan(src, src.stat())
+
+
+def scan_dest(dst: Path) -> Fingerprint:
+    """Stat-only scan of an applied destination; the root is not followed either."""
+    return _scan(dst, dst.lstat())
+
+
+def _source_file(src: Path, rel: str) -> Path:
+    return src if rel == "." else src / rel
+
+
+def fingerprint_source(
+    src: Path, previous: Fingerprint | None = None, digest: Callable[[Path], str] = file_digest
+) -> Fingerprint:
+    """Scan ``src`` and add content digests, reusing ``previous`` digests for unchanged stat tuples."""
+    previous = previous or {}
+    fp = scan_source(src)
+    for rel, entry in fp.items():
+        if entry[0] != "f":
+            continue
+        old = previous.get(rel)
+        if old is not None and old[:6] == entry:
+            entry.append(old[6])
+        else:
+            entry.append(digest(_source_file(src, rel)))
+    return fp
+
+
+class SourceCache:
+    """Source scans and fingerprints shared by the manifests of several worktrees.
+
+    Used for one batch of workspaces: each link source is scanned and hashed once
+    no matter how many worktrees it is applied to. Results are a snapshot; create
+    a new cache to observe later source edits. With ``digests`` content hashes also
+    persist across processes.
+    """
+
+    def __init__(self, digests: DigestCache | None = None) -> None:
+        self.digests = digests
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple[str, Path], threading.Lock] = {}
+        self._scans: dict[Path, Fingerprint] = {}
+        self._fingerprints: dict[Path, Fingerprint] = {}
+        self._digests: dict[Path, str] = {}
+
+    def _memo(self, kind: str, table: dict[Path, Any], key: Path, compute: Callable[[], Any]) -> Any:
+        # single flight per key: concurrent workers wait for the first computation
+        with self._lock:
+            if key in table:
+                return table[key]
+            key_lock = self._key_locks.setdefault((kind, key), threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in table:
+                    return table[key]
+            value = compute()
+            with self._lock:
+                table[key] = value
+            return value
+
+    def scan(self, src: Path) -> Fingerprint:
+        return self._memo("scan", self._scans, src, lambda: scan_source(src))
+
+    def fingerprint(self, src: Path, previous: Fingerprint | None = None) -> Fingerprint:
+        return self._memo("fingerprint", self._fingerprints, src, lambda: fingerprint_source(src, previous, self.digest))
+
+    def digest(self, path: Path) -> str:
+        compute = file_digest if self.digests is None else self.digests.digest
+        return self._memo("digest", self._digests, path, lambda: compute(path))
+
+    def save(self) -> None:
+        if self.digests is not None:
+            self.digests.save()
+
+
+def _matches(src: Path, recorded: Fingerprint, current: Fingerprint, digest: Callable[[Path], str] = file_digest) -> bool:
+    if recorded.keys() != current.keys():
+        return False
+    for rel, entry in current.items():
+        old = recorded[rel]
+        if old[:6] == entry:
+            continue
+        # only the inode moved (file replaced by an identical copy): confirm by content;
+        # a new size, mtime or mode has to reach the destination (rsync -a)
+        if entry[0] != "f" or old[0] != "f" or (old[1], old[2], old[5]) != (entry[1], entry[2], entry[5]):
+            return False
+        if digest(_source_file(src, rel)) != old[6]:
+            return False
+    return True
+
+
+@dataclass
+class LinkManifest:
+    """Last-applied source fingerprints and destination stat tuples for each link target of one worktree.
+
+    A target whose source still matches its recorded fingerprint and whose
+    destination still has the recorded entries and stat tuples is considered up
+    to date without diffing or hashing the destination tree. Any edit, extra or
+    deleted entry in the destination falls back to the full diff.
+    """
+
+    path: Path | None
+    links: dict[str, dict[str, Any]] = field(default_factory=dict)
+    sources: SourceCache | None = None
+
+    @classmethod
+    def load(cls, path: Path | None, sources: SourceCache | None = None) -> LinkManifest:
+        if path is None:
+            return cls(None, sources=sources)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(path, sources=sources)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path, sources=sources)
+        return cls(path, dict(data.get("links") or {}), sources)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "links": self.links}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _entry(self, src: Path, dst: Path, policy: LinkPolicy) -> dict[str, Any] | None:
+        entry = self.links.get(str(dst))
+        if not entry or entry.get("source") != str(src) or entry.get("type") != policy.type:
+            return None
+        if policy.delete and not entry.get("delete"):
+            return None
+        return entry
+
+    def status(self, src: Path, dst: Path, policy: LinkPolicy) -> str:
+        """State of ``dst`` against its last apply from ``src``.
+
+        "current" when neither side has changed since, "source" when only the source
+        has (the destination is still exactly what was written) and "" when there is
+        no usable record or the destination was edited.
+        """
+        entry = self._entry(src, dst, policy)
+        if entry is None:
+            return ""
+        try:
+            if scan_dest(dst) != entry.get("dest"):
+                return ""
+            if self.sources is None:
+                same = _matches(src, entry["files"], scan_source(src))
+            else:
+                same = _matches(src, entry["files"], self.sources.scan(src), self.sources.digest)
+        except OSError:
+            return ""
+        return "current" if same else "source"
+
+    def is_current(self, src: Path, dst: Path, policy: LinkPolicy) -> bool:
+        """True when ``dst`` was applied from ``src`` and neither side has changed since."""
+        return self.status(src, dst, policy) == "current"
+
+    def record(self, src: Path, dst: Path, policy: LinkPolicy) -> None:
+        old = self.links.get(str(dst))
+        previous = old.get("files") if old and old.get("source") == str(src) else None
+        self.links[str(dst)] = {
+            "source": str(src),
+            "type": policy.type,
+            "delete": policy.delete,
+            "files": fingerprint_source(src, previous) if self.sources is None else self.sources.fingerprint(src, previous),
+            "dest": scan_dest(dst),
+        }
+
+    def forget(self, dst: Path) -> None:
+        self.links.pop(str(dst), None)
@@ -1,113 +1,58 @@
 from __future__ import annotations
 
-from enum import StrEnum
-from pathlib import Path
+import contextlib
+import functools
+import threading
+from collections.abc import Callable
 from typing import Any
 
-from mcp.server.fastmcp import FastMCP
+import anyio
+import anyio.to_thread
+from anyio.from_thread import BlockingPortal
+from mcp.server.fastmcp import Context, FastMCP
 
-from .core import apply_links, ensure_inventory, init_workspace_layout, plan_links, workspace_path
-from .inventory import load_inventory, write_inventory
-from .policy import effective_policy
+from . import tools
+from .tools import WorkspaceMode
 
 mcp = FastMCP("wtplan", json_response=True)
 
 
-class WorkspaceMode(StrEnum):
-    """Workspace creation mode."""
+async def _offload(fn: Callable[..., dict[str, Any]], *args: Any) -> dict[str, Any]:
+    """Run blocking tool logic (filesystem, git) on a worker thread so the event loop keeps serving requests."""
+    return await anyio.to_thread.run_sync(functools.partial(fn, *args))
 
-    PRESET = "preset"
-    REPO = "repo"
 
+async def _offload_apply(ctx: Context | None, fn: Callable[..., dict[str, Any]], *args: Any) -> dict[str, Any]:
+    """Like _offload, streaming ``progress`` callbacks as MCP progress notifications.
 
-def _workspace_add(
-    mode: WorkspaceMode,
-    identifier: str,
-    issue_iid: int,
-    base: str | None = None,
-    apply: bool = False,
-    force_links: bool = False,
-    delete_links: bool = False,
-) -> dict[str, Any]:
-    """Unified workspace creation logic."""
-    base_dir = Path.cwd()
-    inv = load_inventory(base_dir / ".wtplan.yml")
-
-    # Resolve workspace parameters based on mode
-    preset = identifier if mode == WorkspaceMode.PRESET else None
-    repo = identifier if mode == WorkspaceMode.REPO else None
-
-    # Validate and compute path
-    try:
-        ws_path = workspace_path(inv, base_dir, preset=preset, iid=issue_iid, repo=repo)
-    except KeyError as e:
-        return {"error": f"Unknown {mode.value}: {identifier}", "details": str(e)}
-
-    pol = effective_policy(inv, cli_force=force_links, cli_delete=delete_links)
-    planned = plan_links(inv, base_dir, pol)
-
-    result: dict[str, Any] = {
-        "apply": apply,
-        "base": base,
-        mode.value: identifier,
-        "issue_iid": issue_iid,
-    }
-
-    if not apply:
-        result["plan"] = [p.__dict__ for p in planned]
-        if mode == WorkspaceMode.REPO:
-            result["workspace"] = str(ws_path)
-            result["mode"] = "single_repo"
-        return result
-
-    applied = apply_links(inv, base_dir, pol)
-    result["result"] = [p.__dict__ for p in applied]
-    if mode == WorkspaceMode.REPO:
-        result["workspace"] = str(ws_path)
-        result["mode"] = "single_repo"
-
-    return result
-
-
-def _workspace_path(
-    mode: WorkspaceMode,
-    identifier: str,
-    issue_iid: int,
-) -> dict[str, Any]:
-    """Unified path resolution."""
-    base_dir = Path.cwd()
-    inv = load_inventory(base_dir / ".wtplan.yml")
-    preset = identifier if mode == WorkspaceMode.PRESET else None
-    repo = identifier if mode == WorkspaceMode.REPO else None
-    p = workspace_path(inv, base_dir, preset=preset, iid=issue_iid, repo=repo)
-    result: dict[str, Any] = {
-        "path": str(p),
-        mode.value: identifier,
-        "issue_iid": issue_iid,
-    }
-    if mode == WorkspaceMode.REPO:
-        result["mode"] = "single_repo"
-    return result
-
-
-def _workspace_remove(
-    mode: WorkspaceMode,
-    identifier: str,
-    issue_iid: int,
-    force: bool = False,
-    apply: bool = False,
-) -> dict[str, Any]:
-    """Unified removal stub."""
-    result: dict[str, Any] = {
-        "apply": apply,
-        "force": force,
-        "note": "safe delete (dirty/unpushed/diverged/unknown) is not implemented in v0.1",
-        mode.value: identifier,
-        "issue_iid": issue_iid,
-    }
-    if mode == WorkspaceMode.REPO:
-        result["mode"] = "single_repo"
-    return result
+    When the request is cancelled the worker is told to stop between files; it is
+    not waited for, and files it already replaced are complete.
+    """
+    cancel = threading.Event()
+    sent = 0
+
+    async def report(subject: str, message: str) -> None:
+        nonlocal sent
+        sent += 1
+        if ctx is not None:
+            await ctx.report_progress(sent, message=f"[{subject}] {message}")
+
+    async with BlockingPortal() as portal:
+
+        def progress(subject: str, message: str) -> None:
+            if not cancel.is_set():
+                with contextlib.suppress(RuntimeError):  # portal closed by a cancellation meanwhile
+                    portal.call(report, subject, message)
+
+        call = functools.partial(fn, *args, progress=progress, cancel=cancel)
+        try:
+            return await anyio.to_thread.run_sync(call, abandon_on_cancel=True)
+        except anyio.get_cancelled_exc_class():
+            cancel.set()
+            raise
+        except Exception as e:  # re-raised outside the portal so it is not wrapped in an ExceptionGroup
+            error = e
+    raise error
 
 
 def _create_workspace_prompt(mode: str, identifier_name: str, identifier: str, issue_iid: int, base: str | None = None) -> str:
@@ -133,98 +78,158 @@ def _safe_remove_prompt(mode: str, identifier_name: str, identifier: str, issue_
 
 
 @mcp.tool(name="init")
-def tool_init(toolbox_dir: str | None = None, config_path: str | None = None) -> dict[str, Any]:
+async def tool_init(toolbox_dir: str | None = None, config_path: str | None = None) -> dict[str, Any]:
     """Initialize inventory, prepare bare repository, optionally enable toolbox."""
-    base = Path.cwd()
-    inv_path = Path(config_path) if config_path else base / ".wtplan.yml"
-    try:
-        inv = load_inventory(inv_path)
-    except FileNotFoundError:
-        ensure_inventory(base, toolbox_dir=toolbox_dir)
-        inv = load_inventory(inv_path)
-    if toolbox_dir and "toolbox_dir" not in inv:
-        inv["toolbox_dir"] = toolbox_dir
-        write_inventory(inv_path, inv)
-    layout = init_workspace_layout(inv, base)
-    return {"inventory": str(inv_path), "layout": layout}
+    return await _offload(tools.init, toolbox_dir, config_path)
 
 
 @mcp.tool(name="plan")
-def tool_plan(workspace_id: str | None = None) -> dict[str, Any]:
-    """Summarize differences between inventory and actual state (create/delete/update)."""
-    base = Path.cwd()
-    inv_path = base / ".wtplan.yml"
-    try:
-        inv = load_inventory(inv_path)
-    except FileNotFoundError:
-        return {"error": f"Inventory not found: {inv_path}. Run 'wtplan init' first."}
-    pol = effective_policy(inv, cli_force=False, cli_delete=False)
-    items = [pi.__dict__ for pi in plan_links(inv, base, pol)]
-    return {"links_repo_root": items, "note": "git worktree operations are not implemented in v0.1"}
+async def tool_plan(workspace_id: str | None = None, all_workspaces: bool | None = False) -> dict[str, Any]:
+    """Summarize differences between inventory and actual state (create/delete/update).
+
+    all_workspaces=true gives one status line per workspace; workspace_id drills into one.
+    """
+    return await _offload(tools.plan, workspace_id, all_workspaces or False)
+
+
+@mcp.tool(name="list")
+async def tool_list() -> dict[str, Any]:
+    """List indexed workspaces with their paths, created time and last apply state."""
+    return await _offload(tools.list_workspaces)
+
+
+@mcp.tool(name="gc")
+async def tool_gc(
+    older_than_days: float | None = None,
+    merged: bool | None = False,
+    apply: bool | None = False,
+    jobs: int | None = None,
+) -> dict[str, Any]:
+    """Find issue workspaces idle for older_than_days and/or with merged branches; report reclaimable bytes.
+
+    apply=true removes those passing the safe-remove checks, then prunes and gc's each bare repo once.
+    """
+    return await _offload(tools.gc, older_than_days, merged or False, apply or False, jobs)
+
+
+@mcp.tool(name="du")
+async def tool_du(jobs: int | None = None) -> dict[str, Any]:
+    """Disk usage per workspace and bare repo: unique vs shared (hard-linked) bytes, and copy cost per link item."""
+    return await _offload(tools.du, jobs)
 
 
 @mcp.tool(name="preset_add")
-def tool_preset_add(
+async def tool_preset_add(
     preset: str,
     issue_iid: int,
     base: str | None = None,
     apply: bool | None = False,
     force_links: bool | None = False,
     delete_links: bool | None = False,
+    jobs: int | None = None,
+    ctx: Context | None = None,
 ) -> dict[str, Any]:
     """Create workspace from preset + Issue IID (plan → confirm → apply)."""
-    return _workspace_add(
-        WorkspaceMode.PRESET, preset, issue_iid, base, apply or False, force_links or False, delete_links or False
+    return await _offload_apply(
+        ctx,
+        tools.workspace_add,
+        WorkspaceMode.PRESET,
+        preset,
+        issue_iid,
+        base,
+        apply or False,
+        force_links or False,
+        delete_links or False,
+        jobs,
+    )
+
+
+@mcp.tool(name="preset_add_batch")
+async def tool_preset_add_batch(
+    preset: str,
+    issue_iids: list[int],
+    base: str | None = None,
+    apply: bool | None = False,
+    force_links: bool | None = False,
+    delete_links: bool | None = False,
+    jobs: int | None = None,
+    ctx: Context | None = None,
+) -> dict[str, Any]:
+    """Create workspaces from preset for many Issue IIDs in one call (shared plan, parallel apply)."""
+    return await _offload_apply(
+        ctx,
+        tools.workspace_add_batch,
+        WorkspaceMode.PRESET,
+        preset,
+        issue_iids,
+        base,
+        apply or False,
+        force_links or False,
+        delete_links or False,
+        jobs,
     )
 
 
 @mcp.tool(name="repo_add")
-def tool_repo_add(
+async def tool_repo_add(
     repo: str,
     issue_iid: int,
     base: str | None = None,
     apply: bool | None = False,
     force_links: bool | None = False,
     delete_links: bool | None = False,
+    jobs: int | None = None,
+    ctx: Context | None = None,
 ) -> dict[str, Any]:
     """Create workspace from single repo + Issue IID (no preset required)."""
-    return _workspace_add(
-        WorkspaceMode.REPO, repo, issue_iid, base, apply or False, force_links or False, delete_links or False
+    return await _offload_apply(
+        ctx,
+        tools.workspace_add,
+        WorkspaceMode.REPO,
+        repo,
+        issue_iid,
+        base,
+        apply or False,
+        force_links or False,
+        delete_links or False,
+        jobs,
     )
 
 
 @mcp.tool(name="preset_rm")
-def tool_preset_rm(
+async def tool_preset_rm(
     preset: str,
     issue_iid: int,
     force: bool | None = False,
     apply: bool | None = False,
+    jobs: int | None = None,
 ) -> dict[str, Any]:
-    """Safely remove workspace from preset + Issue IID (v0.1 is a stub)."""
-    return _workspace_remove(WorkspaceMode.PRESET, preset, issue_iid, force or False, apply or False)
+    """Safely remove workspace from preset + Issue IID (refuses dirty/unpushed/diverged/unknown worktrees unless force)."""
+    return await _offload(tools.workspace_remove, WorkspaceMode.PRESET, preset, issue_iid, force or False, apply or False, jobs)
 
 
 @mcp.tool(name="repo_rm")
-def tool_repo_rm(
+async def tool_repo_rm(
     repo: str,
     issue_iid: int,
     force: bool | None = False,
     apply: bool | None = False,
+    jobs: int | None = None,
 ) -> dict[str, Any]:
-    """Safely remove workspace from single repo + Issue IID (v0.1 is a stub)."""
-    return _workspace_remove(WorkspaceMode.REPO, repo, issue_iid, force or False, apply or False)
+    """Safely remove workspace from single repo + Issue IID (refuses dirty/unpushed/diverged/unknown worktrees unless force)."""
+    return await _offload(tools.workspace_remove, WorkspaceMode.REPO, repo, issue_iid, force or False, apply or False, jobs)
 
 
 @mcp.tool(name="preset_path")
-def tool_preset_path(preset: str, issue_iid: int) -> dict[str, Any]:
+async def tool_preset_path(preset: str, issue_iid: int) -> dict[str, Any]:
     """Return absolute path of workspace from preset + Issue IID (read-only reference)."""
-    return _workspace_path(WorkspaceMode.PRESET, preset, issue_iid)
+    return await _offload(tools.workspace_location, WorkspaceMode.PRESET, preset, issue_iid)
 
 
 @mcp.tool(name="repo_path")
-def tool_repo_path(repo: str, issue_iid: int) -> dict[str, Any]:
+async def tool_repo_path(repo: str, issue_iid: int) -> dict[str, Any]:
     """Return absolute path of workspace from single repo + Issue IID (read-only reference)."""
-    return _workspace_path(WorkspaceMode.REPO, repo, issue_iid)
+    return await _offload(tools.workspace_location, WorkspaceMode.REPO, repo, issue_iid)
 
 
 @mcp.prompt(name="create_preset_workspace")
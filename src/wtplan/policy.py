@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+# checked where links are planned/applied, so a bad type never breaks path/list/du
+LINK_TYPES = ("symlink", "copy", "hardlink")
+
 
 @dataclass(frozen=True)
 class LinkPolicy:
-    type: str = "symlink"  # symlink|copy
+    type: str = "symlink"  # symlink|copy|hardlink
     force: bool = False
     delete: bool = False
 
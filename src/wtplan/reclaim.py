@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .fetch import scheduler
+from .fleet import Workspace
+from .git import GitError, gc_auto, merge_state, prune_worktrees, resolve_base
+from .remove import BLOCKING, WorktreeCheck, check_worktree
+from .usage import reclaimable_bytes
+
+# directory names produced by compute_workspace_id; anything else under workspaces_dir is left alone
+ISSUE_WORKSPACE = re.compile(r".+_ISSUE_\d{4,}")
+DAY = 86400.0
+
+
+@dataclass
+class Candidate:
+    """A workspace selected for garbage collection and the safe-remove checks of its worktrees."""
+
+    ws: Workspace
+    last_activity: float
+    reasons: list[str]
+    checks: list[WorktreeCheck] = field(default_factory=list)
+    bytes: int = 0
+
+    @property
+    def blocked(self) -> bool:
+        return any(c.state in BLOCKING for c in self.checks)
+
+    def to_dict(self, now: float) -> dict[str, Any]:
+        return {
+            "id": self.ws.id,
+            "key": self.ws.key,
+            "path": str(self.ws.path.parent),
+            "last_activity": datetime.fromtimestamp(self.last_activity, UTC).isoformat(timespec="seconds"),
+            "idle_days": round((now - self.last_activity) / DAY, 1),
+            "reasons": self.reasons,
+            "status": {c.repo: c.state for c in self.checks},
+            "bytes": self.bytes,
+            "action": "blocked" if self.blocked else "remove",
+        }
+
+
+def _gitdir(worktree: Path) -> Path | None:
+    try:
+        text = (worktree / ".git").read_text(encoding="utf-8")
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+    if not text.startswith("gitdir:"):
+        return None
+    return Path(text.removeprefix("gitdir:").strip())
+
+
+def last_activity(ws_dir: Path, repos: list[str]) -> float:
+    """Newest mtime of the workspace, its worktree directories and their git index/HEAD/reflog.
+
+    Files edited deep inside a worktree are not visited; any commit, checkout or
+    ``git status`` that refreshes the index counts as activity.
+    """
+    paths = [ws_dir]
+    for r in repos:
+        wt = ws_dir / r
+        paths.append(wt)
+        gitdir = _gitdir(wt)
+        if gitdir is not None:
+            paths += [gitdir / "index", gitdir / "HEAD", gitdir / "logs" / "HEAD"]
+    newest = 0.0
+    for p in paths:
+        try:
+            newest = max(newest, os.stat(p).st_mtime)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return newest
+
+
+def branches_merged(ws_dir: Path, repos: list[str], bares: dict[str, Path]) -> bool:
+    """True when some worktree's branch was merged into the default branch and none has open work."""
+    states = set()
+    for r in repos:
+        if not (ws_dir / r / ".git").exists():
+            continue
+        try:
+            states.add(merge_state(ws_dir / r, resolve_base(bares[r], None)))
+        except GitError:
+            return False
+    return "merged" in states and "open" not in states
+
+
+def evaluate(
+    ws: Workspace,
+    bares: dict[str, Path],
+    *,
+    now: float,
+    older_than: float | None,
+    merged: bool,
+    ignore: tuple[str, ...],
+) -> Candidate | None:
+    """Candidate for ``ws`` when it is idle for ``older_than`` days or (with ``merged``) merged; else None.
+
+    Age is read before any git command runs, since ``git status`` may touch the index.
+    """
+    if not ws.exists or not ISSUE_WORKSPACE.fullmatch(ws.id):
+        return None
+    ws_dir = ws.path.parent
+    repos = [r for r in ws.repos if r in bares]
+    active = last_activity(ws_dir, repos)
+    reasons = []
+    if older_than is not None and now - active >= older_than * DAY:
+        reasons.append(f"idle {int((now - active) // DAY)}d")
+    if merged and branches_merged(ws_dir, repos, bares):
+        reasons.append("merged")
+    if not reasons:
+        return None
+    checks = [check_worktree(r, ws_dir / r, bares[r], ignore if r == ws.path.name else ()) for r in repos]
+    return Candidate(ws, active, reasons, checks, reclaimable_bytes(ws_dir))
+
+
+def refresh(bare: Path, ttl: float) -> str:
+    """Fetch ``bare`` (unless fresh) so merge detection sees the current default branch."""
+    try:
+        return scheduler.fetch(bare, ttl=ttl)
+    except GitError:
+        return "stale"
+
+
+def compact(bare: Path) -> str:
+    """``git worktree prune`` then ``git gc --auto``, once per bare repo after a collection."""
+    try:
+        prune_worktrees(bare)
+        gc_auto(bare)
+    except GitError as e:
+        return str(e)
+    return "ok"
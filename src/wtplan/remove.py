@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from .core import PlanItem
+from .git import (
+    GitError,
+    ahead_behind,
+    is_worktree,
+    prune_worktrees,
+    remove_worktree,
+    status_porcelain,
+    unpublished_commits,
+)
+from .manifest import MANIFEST_SUFFIX
+from .workers import resolve, worker_pool
+
+# states that block removal unless forced
+BLOCKING = ("dirty", "unpushed", "diverged", "unknown")
+
+
+@dataclass(frozen=True)
+class WorktreeCheck:
+    repo: str
+    path: Path
+    bare: Path
+    state: str  # clean|dirty|unpushed|diverged|unknown|missing
+    detail: str
+
+
+def _ignored(rel: str, ignore: tuple[str, ...]) -> bool:
+    rel = rel.rstrip("/")
+    return any(rel == i or rel.startswith(f"{i}/") for i in ignore)
+
+
+def _git_state(path: Path, ignore: tuple[str, ...]) -> tuple[str, str]:
+    headers, changed = status_porcelain(path)
+    changed = [c for c in changed if not _ignored(c, ignore)]
+    if changed:
+        return "dirty", f"{len(changed)} modified or untracked paths, e.g. {changed[0]}"
+    branch = headers.get("branch.head", "")
+    counts = ahead_behind(path, branch) if branch and branch != "(detached)" else None
+    if counts is None:
+        ahead = unpublished_commits(path)
+        if ahead:
+            return "unpushed", f"{ahead} commits not on any remote branch"
+    elif counts[0] and counts[1]:
+        return "diverged", f"{counts[0]} ahead, {counts[1]} behind origin/{branch}"
+    elif counts[0]:
+        return "unpushed", f"{counts[0]} commits ahead of origin/{branch}"
+    return "clean", f"clean on {branch or '?'}"
+
+
+def check_worktree(repo: str, path: Path, bare: Path, ignore: tuple[str, ...] = ()) -> WorktreeCheck:
+    """Classify a worktree for safe removal.
+
+    ``ignore`` are worktree-relative paths wtplan itself materialized (links_repo_root
+    targets); untracked entries under them do not make the worktree dirty.
+    """
+    if not path.exists() and not path.is_symlink():
+        return WorktreeCheck(repo, path, bare, "missing", "path does not exist")
+    if not is_worktree(path):
+        return WorktreeCheck(repo, path, bare, "unknown", "not a git worktree")
+    try:
+        state, detail = _git_state(path, ignore)
+    except GitError as e:
+        state, detail = "unknown", str(e)
+    return WorktreeCheck(repo, path, bare, state, detail)
+
+
+def check_worktrees(worktrees: list[tuple[str, Path, Path, tuple[str, ...]]], *, jobs: int = 1) -> list[WorktreeCheck]:
+    """Check (repo, path, bare, ignore) tuples concurrently; results keep input order."""
+    with worker_pool(jobs, "wtplan-check") as pool:
+        return resolve([pool.submit(check_worktree, *w) for w in worktrees])
+
+
+def plan_removal(checks: list[WorktreeCheck], *, force: bool) -> list[PlanItem]:
+    items = []
+    for c in checks:
+        if c.state == "missing":
+            items.append(PlanItem("NOOP", str(c.path), c.detail))
+        elif c.state in BLOCKING and not force:
+            items.append(PlanItem("CONFLICT", str(c.path), f"{c.state}: {c.detail} (use --force)"))
+        else:
+            items.append(PlanItem("DELETE", str(c.path), f"{c.state}: git worktree remove"))
+    return items
+
+
+def _remove_one(c: WorktreeCheck) -> PlanItem:
+    try:
+        remove_worktree(c.bare, c.path)
+    except GitError as e:
+        return PlanItem("CONFLICT", str(c.path), str(e))
+    return PlanItem("DELETE", str(c.path), f"removed ({c.state})")
+
+
+def apply_removal(
+    ws_dir: Path, checks: list[WorktreeCheck], *, force: bool, jobs: int = 1, prune: bool = True
+) -> list[PlanItem]:
+    """Remove every worktree of a workspace, or none of them if any is unsafe and not ``force``.
+
+    Worktrees are removed concurrently, then each bare repo is pruned once (unless
+    ``prune`` is False, for callers removing many workspaces) and the workspace
+    directory is deleted when only wtplan's own files are left in it.
+    """
+    planned = plan_removal(checks, force=force)
+    if any(p.kind == "CONFLICT" for p in planned):
+        return planned
+    with worker_pool(jobs, "wtplan-rm") as pool:
+        slots = [pool.submit(_remove_one, c) if p.kind == "DELETE" else p for c, p in zip(checks, planned, strict=True)]
+        done = resolve(slots)
+        if prune:
+            resolve([pool.submit(prune_worktrees, b) for b in existing_bares(checks)])
+    if not any(p.kind == "CONFLICT" for p in done):
+        _remove_workspace_dir(ws_dir)
+    return done
+
+
+def existing_bares(checks: list[WorktreeCheck]) -> list[Path]:
+    return sorted({c.bare for c in checks if (c.bare / "HEAD").exists()})
+
+
+def _remove_workspace_dir(ws_dir: Path) -> None:
+    try:
+        with os.scandir(ws_dir) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        return
+    if any(not (e.name.startswith(".") and e.name.endswith(MANIFEST_SUFFIX)) for e in entries):
+        return
+    for e in entries:
+        os.unlink(e.path)
+    ws_dir.rmdir()
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import stat
+from collections.abc import Iterator
+from concurrent.futures import Executor, Future, wait
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from . import trace
+from .fastcopy import copy_file
+from .workers import ApplyCancelledError, Transfer, resolve
+
+HASH_DIGEST_SIZE = 32
+
+
+@dataclass(frozen=True)
+class Change:
+    kind: str  # ADD|UPDATE|DELETE
+    rel: str  # path relative to the synced root ("." for the root itself)
+    is_dir: bool = False
+    strategy: str = ""  # copy strategy used by sync_path (reflink|copy_file_range|sendfile|copy|symlink|hardlink|metadata)
+    meta: bool = False  # content is identical, only mode or mtime differ
+    is_link: bool = False  # the source entry is a symlink (recreated, never followed)
+
+
+def file_digest(path: Path) -> str:
+    """Return a chunked BLAKE2b digest of a file's content."""
+    with path.open("rb") as f:
+        digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)).hexdigest()
+        trace.count(hashed_files=1, hashed_bytes=f.tell())
+    return digest
+
+
+def same_file(src: Path, dst: Path, src_st: os.stat_result, dst_st: os.stat_result) -> bool:
+    """Compare two regular files, reading content only when metadata disagrees.
+
+    Same (dev, inode) or same (size, mtime_ns) is treated as identical; copies made
+    with preserved times therefore never need hashing.
+    """
+    if (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+        return True
+    if src_st.st_size != dst_st.st_size:
+        return False
+    if src_st.st_mtime_ns == dst_st.st_mtime_ns:
+        return True
+    return file_digest(src) == file_digest(dst)
+
+
+def _lstat(path: Path) -> os.stat_result | None:
+    try:
+        return path.lstat()
+    except FileNotFoundError:
+        return None
+
+
+def _entry_diff(src: Path, dst: Path, src_st: os.stat_result, dst_st: os.stat_result, hardlink: bool = False) -> str:
+    """Compare two non-directory entries (regular files or symlinks).
+
+    Returns "" when they match, "meta" when a file has the same content but another
+    mode or mtime (rsync -a copies both) and "content" otherwise. With ``hardlink``
+    a shared inode is a match and anything else is compared by content.
+    """
+    if stat.S_ISLNK(src_st.st_mode):
+        return "" if stat.S_ISLNK(dst_st.st_mode) and os.readlink(src) == os.readlink(dst) else "content"
+    if not stat.S_ISREG(dst_st.st_mode):
+        return "content"
+    if hardlink and (src_st.st_dev, src_st.st_ino) == (dst_st.st_dev, dst_st.st_ino):
+        return ""
+    # a separate inode in hardlink mode is a fallback copy (EXDEV/EMLINK/EPERM): compare it like one
+    if not same_file(src, dst, src_st, dst_st):
+        return "content"
+    if stat.S_IMODE(src_st.st_mode) != stat.S_IMODE(dst_st.st_mode) or src_st.st_mtime_ns != dst_st.st_mtime_ns:
+        return "meta"
+    return ""
+
+
+def _changed(rel: str, src: Path, dst: Path, src_st: os.stat_result, dst_st: os.stat_result, hardlink: bool) -> Change | None:
+    """UPDATE for a non-directory source entry whose destination differs; None when up to date."""
+    if stat.S_ISDIR(dst_st.st_mode):
+        return Change("UPDATE", rel, is_link=stat.S_ISLNK(src_st.st_mode))
+    diff = _entry_diff(src, dst, src_st, dst_st, hardlink)
+    return Change("UPDATE", rel, meta=diff == "meta", is_link=stat.S_ISLNK(src_st.st_mode)) if diff else None
+
+
+def same_device(src: Path, dst: Path) -> bool:
+    """Whether ``dst`` (or its nearest existing parent) is on the filesystem of ``src``, so hard links can work."""
+    parent = dst.parent
+    while not parent.exists() and parent != parent.parent:
+        parent = parent.parent
+    return src.stat().st_dev == parent.stat().st_dev
+
+
+def _scan(path: Path) -> dict[str, os.DirEntry[str]]:
+    with os.scandir(path) as it:
+        entries = {e.name: e for e in it}
+    trace.count(entries=len(entries))
+    return entries
+
+
+def _added(src: Path, rel: str, src_st: os.stat_result) -> Iterator[Change]:
+    if not stat.S_ISDIR(src_st.st_mode):
+        yield Change("ADD", rel, is_link=stat.S_ISLNK(src_st.st_mode))
+        return
+    yield Change("ADD", rel, is_dir=True)
+    yield from _children_added(src, rel)
+
+
+def _children_added(src: Path, rel: str) -> Iterator[Change]:
+    entries = _scan(src)
+    for name in sorted(entries):
+        child = entries[name]
+        yield from _added(Path(child.path), _join(rel, name), child.stat(follow_symlinks=False))
+
+
+def _join(rel: str, name: str) -> str:
+    return name if rel == "." else f"{rel}/{name}"
+
+
+def _diff_dir(src: Path, dst: Path, rel: str, delete: bool, hardlink: bool) -> Iterator[Change]:
+    src_entries = _scan(src)
+    dst_entries = _scan(dst)
+    for name in sorted(src_entries):
+        s = src_entries[name]
+        child_rel = _join(rel, name)
+        s_st = s.stat(follow_symlinks=False)
+        d = dst_entries.get(name)
+        if d is None:
+            yield from _added(Path(s.path), child_rel, s_st)
+            continue
+        d_st = d.stat(follow_symlinks=False)
+        if stat.S_ISDIR(s_st.st_mode):
+            if stat.S_ISDIR(d_st.st_mode):
+                yield from _diff_dir(Path(s.path), Path(d.path), child_rel, delete, hardlink)
+            else:
+                yield Change("UPDATE", child_rel, is_dir=True)
+                yield from _children_added(Path(s.path), child_rel)
+        elif (c := _changed(child_rel, Path(s.path), Path(d.path), s_st, d_st, hardlink)) is not None:
+            yield c
+    if delete:
+        for name in sorted(dst_entries.keys() - src_entries.keys()):
+            d = dst_entries[name]
+            yield Change("DELETE", _join(rel, name), is_dir=d.is_dir(follow_symlinks=False))
+
+
+def diff_path(src: Path, dst: Path, *, delete: bool = False, hardlink: bool = False) -> Iterator[Change]:
+    """Yield the changes needed to make ``dst`` mirror ``src`` (rsync -a semantics).
+
+    Directories are compared entry by entry; extra entries in ``dst`` are reported
+    as DELETE only when ``delete`` is set. A file with identical content but another
+    mode or mtime is an UPDATE with ``meta`` set (only its metadata is copied). Symlinks inside a tree are compared as
+    links; ``src`` itself is followed. With ``hardlink`` a file is up to date only
+    when it is the source inode, unless ``dst`` is on another device (then it is
+    compared as a copy).
+    """
+    hardlink = hardlink and same_device(src, dst)
+    src_st = src.stat()
+    dst_st = _lstat(dst)
+    if dst_st is None:
+        yield from _added(src, ".", src_st)
+        return
+    if stat.S_ISDIR(src_st.st_mode):
+        if stat.S_ISDIR(dst_st.st_mode):
+            yield from _diff_dir(src, dst, ".", delete, hardlink)
+        else:
+            yield Change("UPDATE", ".", is_dir=True)
+            yield from _children_added(src, ".")
+        return
+    if (c := _changed(".", src, dst, src_st, dst_st, hardlink)) is not None:
+        yield c
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _copy_file(src: Path, dst: Path) -> str:
+    """Copy content, mode and times into a temp sibling, then rename over ``dst``."""
+    tmp = dst.with_name(f".{dst.name}.wtplan-tmp")
+    try:
+        strategy = copy_file(src, tmp)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if dst.is_dir() and not dst.is_symlink():
+        shutil.rmtree(dst)
+    os.replace(tmp, dst)
+    return strategy
+
+
+def _link_file(src: Path, dst: Path) -> str:
+    """Hard-link ``src`` to a temp sibling, then rename over ``dst``; copy when linking is not possible."""
+    tmp = dst.with_name(f".{dst.name}.wtplan-tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+    except OSError as e:
+        # other device, link count limit, or protected_hardlinks on a file we do not own
+        if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+            raise
+        return _copy_file(src, dst)
+    if dst.is_dir() and not dst.is_symlink():
+        shutil.rmtree(dst)
+    os.replace(tmp, dst)
+    return "hardlink"
+
+
+def _copy_symlink(src: Path, dst: Path) -> None:
+    _remove(dst)
+    os.symlink(os.readlink(src), dst)
+
+
+def _apply_change(src: Path, dst: Path, c: Change, transfer: Transfer | None = None, hardlink: bool = False) -> Change:
+    """Perform one change and return it annotated with the strategy used."""
+    if transfer is not None:
+        transfer.check()
+    s = src if c.rel == "." else src / c.rel
+    d = dst if c.rel == "." else dst / c.rel
+    if c.kind == "DELETE":
+        _remove(d)
+        return c
+    if c.is_dir:
+        if c.kind == "UPDATE":
+            _remove(d)
+        d.mkdir(parents=c.rel == ".")
+        return c
+    if c.meta:
+        shutil.copystat(s, d)
+        return replace(c, strategy="metadata")
+    if s.is_symlink() and c.rel != ".":
+        _copy_symlink(s, d)
+        return replace(c, strategy="symlink")
+    strategy = _link_file(s, d) if hardlink else _copy_file(s, d)
+    size = 0 if strategy == "hardlink" else d.stat().st_size
+    trace.count(files=1, bytes=size)
+    if transfer is not None:
+        transfer.copied(size)
+        transfer.tick(str(d), "hardlinked" if strategy == "hardlink" else f"copied ({strategy})")
+    return replace(c, strategy=strategy)
+
+
+def _restore_dir_times(src: Path, dst: Path, touched_dirs: set[str]) -> None:
+    if not dst.is_dir():
+        return
+    for rel in sorted(touched_dirs, key=lambda r: -1 if r == "." else r.count("/"), reverse=True):
+        shutil.copystat(src if rel == "." else src / rel, dst if rel == "." else dst / rel)
+
+
+def sync_path(
+    src: Path,
+    dst: Path,
+    *,
+    delete: bool = False,
+    executor: Executor | None = None,
+    transfer: Transfer | None = None,
+    hardlink: bool = False,
+) -> list[Change]:
+    """Make ``dst`` mirror ``src`` in a single walk and return the changes made.
+
+    Unchanged files are left untouched. Modes and times are preserved (rsync -a);
+    with ``delete`` extra entries are removed during the same walk (rsync -a --delete).
+    With an ``executor``, file copies run on it while the walk continues; directory
+    creation and deletes stay in walk order and the result order is unchanged.
+    A ``transfer`` counts copied files/bytes, gets a throttled report per file and raises
+    ApplyCancelledError between files once cancelled. Files already replaced stay
+    complete; a ``dst`` that did not exist before is removed again on cancellation, an
+    existing one is left partially updated (the next sync finishes it). With
+    ``hardlink`` files are hard-linked to the source instead of copied (copied across
+    devices).
+    """
+    hardlink = hardlink and same_device(src, dst)
+    created = _lstat(dst) is None
+    slots: list[Change | Future[Change]] = []
+    touched_dirs: set[str] = set()
+    try:
+        for c in diff_path(src, dst, delete=delete, hardlink=hardlink):
+            if executor is not None and c.kind != "DELETE" and not c.is_dir:
+                slots.append(executor.submit(_apply_change, src, dst, c, transfer, hardlink))
+            else:
+                slots.append(_apply_change(src, dst, c, transfer, hardlink))
+            if c.is_dir and c.kind != "DELETE":
+                touched_dirs.add(c.rel)
+            touched_dirs.add(c.rel.rpartition("/")[0] or ".")
+        done = resolve(slots)
+    except ApplyCancelledError:
+        # let in-flight copies finish before removing what this sync created
+        wait([s for s in slots if isinstance(s, Future)])
+        if created:
+            _remove(dst)
+        raise
+    _restore_dir_times(src, dst, touched_dirs)
+    return done
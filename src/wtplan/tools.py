@@ -0,0 +1,585 @@
+"""Tool logic shared by the CLI and the MCP server.
+
+Kept free of MCP imports so that CLI commands do not pay for FastMCP (pydantic,
+anyio, starlette) at startup; ``mcp_server`` only registers these functions.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from enum import StrEnum
+from pathlib import Path
+from typing import Any
+
+from . import fleet, index, reclaim, remove, trace, usage
+from .core import (
+    PlanItem,
+    apply_links,
+    ensure_inventory,
+    init_workspace_layout,
+    plan_links,
+    workspace_path,
+    workspace_repos,
+)
+from .digests import digest_cache_path, load_digests_cached
+from .fetch import fetch_ttl
+from .inventory import CachedInventory, load_inventory_cached, update_inventory
+from .manifest import LinkManifest, SourceCache, link_manifest_path
+from .policy import LinkPolicy, effective_policy, per_link_policy
+from .workers import ApplyCancelledError, Progress, Transfer, effective_jobs, resolve, worker_pool
+from .worktree import WorktreeSpec, apply_worktrees, bare_repo_path, plan_worktree, worktree_specs
+
+
+class WorkspaceMode(StrEnum):
+    """Workspace creation mode."""
+
+    PRESET = "preset"
+    REPO = "repo"
+
+
+def _policy(cached: CachedInventory, force_links: bool, delete_links: bool) -> LinkPolicy:
+    if force_links or delete_links:
+        return effective_policy(cached.data, cli_force=force_links, cli_delete=delete_links)
+    return cached.policy
+
+
+def _resolve_workspace(
+    cached: CachedInventory, base_dir: Path, mode: WorkspaceMode, identifier: str, issue_iid: int, base: str | None
+) -> tuple[Path, list[WorktreeSpec]]:
+    """Primary worktree path and worktree specs of a workspace; KeyError for an unknown preset."""
+    inv = cached.data
+    preset = identifier if mode == WorkspaceMode.PRESET else None
+    repo = identifier if mode == WorkspaceMode.REPO else None
+    ws_path = workspace_path(inv, base_dir, preset=preset, iid=issue_iid, repo=repo, paths=cached.paths)
+    repos = workspace_repos(inv, preset, repo)
+    return ws_path, worktree_specs(inv, cached.paths, ws_path.parent, repos, issue_iid, base, preset)
+
+
+def _add_one(
+    cached: CachedInventory,
+    mode: WorkspaceMode,
+    identifier: str,
+    issue_iid: int,
+    ws_path: Path,
+    specs: list[WorktreeSpec],
+    pol: LinkPolicy,
+    manifest: LinkManifest,
+    *,
+    base: str | None,
+    apply: bool,
+    jobs: int,
+    progress: Progress | None,
+    transfer: Transfer,
+) -> tuple[dict[str, Any], bool]:
+    """Plan or apply one workspace; returns the result and whether it should be indexed."""
+    inv = cached.data
+    result: dict[str, Any] = {
+        "apply": apply,
+        "base": base,
+        mode.value: identifier,
+        "issue_iid": issue_iid,
+    }
+    if mode == WorkspaceMode.REPO:
+        result["workspace"] = str(ws_path)
+        result["mode"] = "single_repo"
+
+    if not apply:
+        with trace.span("plan.worktrees"):
+            result["worktrees"] = [plan_worktree(s).__dict__ for s in specs]
+        with trace.span("plan.links"):
+            result["plan"] = [p.__dict__ for p in plan_links(inv, ws_path, pol, manifest=manifest)]
+        return result, False
+
+    try:
+        transfer.check()
+        with trace.span("apply.worktrees"):
+            worktrees = apply_worktrees(specs, jobs=jobs, progress=progress, fetch_ttl=fetch_ttl(inv))
+        result["worktrees"] = [w.__dict__ for w in worktrees]
+        # links_repo_root is materialized into the primary worktree only once it exists
+        if worktrees[0].kind == "CONFLICT":
+            applied = [PlanItem("CONFLICT", str(ws_path), "primary worktree not created; links skipped")]
+        else:
+            transfer.check()
+            with trace.span("apply.links"):
+                applied = apply_links(inv, ws_path, pol, manifest=manifest, jobs=jobs, transfer=transfer)
+    except ApplyCancelledError:
+        result["cancelled"] = True
+        result["result"] = [PlanItem("CONFLICT", str(ws_path), "apply cancelled; re-run apply to resume").__dict__]
+        return result, False
+    result["result"] = [p.__dict__ for p in applied]
+    return result, worktrees[0].kind != "CONFLICT"
+
+
+def _record(
+    entries: index.Entries,
+    mode: WorkspaceMode,
+    identifier: str,
+    ws_path: Path,
+    specs: list[WorktreeSpec],
+    result: dict[str, Any],
+) -> None:
+    index.record_apply(
+        entries,
+        index.workspace_key(mode.value, identifier, result["issue_iid"]),
+        mode=mode.value,
+        identifier=identifier,
+        iid=result["issue_iid"],
+        ws_id=ws_path.parent.name,
+        path=ws_path,
+        repos={s.repo: s.path for s in specs},
+        items=result["worktrees"] + result["result"],
+    )
+
+
+@trace.traced("workspace_add")
+def workspace_add(
+    mode: WorkspaceMode,
+    identifier: str,
+    issue_iid: int,
+    base: str | None = None,
+    apply: bool = False,
+    force_links: bool = False,
+    delete_links: bool = False,
+    jobs: int | None = None,
+    progress: Progress | None = None,
+    cancel: threading.Event | None = None,
+) -> dict[str, Any]:
+    """Unified workspace creation logic.
+
+    ``progress`` receives per-repo, per-link-item and (throttled) per-file updates during
+    apply; setting ``cancel`` stops the apply between files and returns with ``cancelled``.
+    A link target the apply was creating is removed again, but a copied tree that was
+    being updated (``force_links``) keeps the files already replaced; re-running apply
+    with the same flags finishes it.
+    """
+    base_dir = Path.cwd()
+    inv_path = base_dir / ".wtplan.yml"
+    with trace.span("inventory"):
+        cached = load_inventory_cached(inv_path)
+
+    try:
+        with trace.span("resolve"):
+            ws_path, specs = _resolve_workspace(cached, base_dir, mode, identifier, issue_iid, base)
+            pol = _policy(cached, force_links, delete_links)
+    except KeyError as e:
+        return {"error": f"Unknown {mode.value}: {identifier}", "details": str(e)}
+
+    with trace.span("manifest.load"):
+        sources = SourceCache(load_digests_cached(digest_cache_path(inv_path)))
+        manifest = LinkManifest.load(link_manifest_path(ws_path), sources)
+    result, indexable = _add_one(
+        cached,
+        mode,
+        identifier,
+        issue_iid,
+        ws_path,
+        specs,
+        pol,
+        manifest,
+        base=base,
+        apply=apply,
+        jobs=effective_jobs(cached.data, jobs),
+        progress=progress,
+        transfer=Transfer(progress, cancel),
+    )
+    with trace.span("digests.save"):
+        sources.save()
+    if indexable:
+        with trace.span("index.record"), index.update_index(inv_path, cached.data) as entries:
+            _record(entries, mode, identifier, ws_path, specs, result)
+    return result
+
+
+def _status(result: dict[str, Any]) -> str:
+    if "error" in result:
+        return "error"
+    if result.get("cancelled"):
+        return "cancelled"
+    items = result.get("worktrees", []) + result.get("result", result.get("plan", []))
+    return "conflict" if any(i["kind"] == "CONFLICT" for i in items) else "ok"
+
+
+@trace.traced("workspace_add_batch")
+def workspace_add_batch(
+    mode: WorkspaceMode,
+    identifier: str,
+    issue_iids: list[int],
+    base: str | None = None,
+    apply: bool = False,
+    force_links: bool = False,
+    delete_links: bool = False,
+    jobs: int | None = None,
+    progress: Progress | None = None,
+    cancel: threading.Event | None = None,
+) -> dict[str, Any]:
+    """Plan or apply many workspaces of one preset/repo with one aggregated result.
+
+    The inventory and policy are resolved once, link sources are scanned and hashed
+    once for all targets, workspaces run ``jobs`` at a time, and the index is
+    updated with a single inventory write. A workspace that raises gets an ``error``
+    entry (status ``error``); the others are still applied and indexed.
+    """
+    base_dir = Path.cwd()
+    inv_path = base_dir / ".wtplan.yml"
+    with trace.span("inventory"):
+        cached = load_inventory_cached(inv_path)
+    iids = list(dict.fromkeys(issue_iids))
+    try:
+        with trace.span("resolve"):
+            targets = [_resolve_workspace(cached, base_dir, mode, identifier, iid, base) for iid in iids]
+            pol = _policy(cached, force_links, delete_links)
+    except KeyError as e:
+        return {"error": f"Unknown {mode.value}: {identifier}", "details": str(e)}
+
+    sources = SourceCache(load_digests_cached(digest_cache_path(inv_path)))
+    transfer = Transfer(progress, cancel)
+
+    def one(iid: int, ws_path: Path, specs: list[WorktreeSpec]) -> tuple[dict[str, Any], bool]:
+        def repo_progress(subject: str, message: str) -> None:
+            if progress is not None:
+                progress(f"{ws_path.parent.name}/{subject}", message)
+
+        with trace.span("workspace", id=ws_path.parent.name):
+            try:
+                manifest = LinkManifest.load(link_manifest_path(ws_path), sources)
+                return _add_one(
+                    cached,
+                    mode,
+                    identifier,
+                    iid,
+                    ws_path,
+                    specs,
+                    pol,
+                    manifest,
+                    base=base,
+                    apply=apply,
+                    jobs=1,
+                    progress=repo_progress,
+                    transfer=transfer,
+                )
+            except Exception as e:  # one broken workspace must not lose the results of the others
+                failed = {"apply": apply, "base": base, mode.value: identifier, "issue_iid": iid}
+                failed["error"] = f"{type(e).__name__}: {e}"
+                return failed, False
+
+    # parallelism is across workspaces; each workspace runs its repos and links serially
+    with worker_pool(effective_jobs(cached.data, jobs), "wtplan-ws") as pool:
+        outcomes = resolve([pool.submit(one, iid, *target) for iid, target in zip(iids, targets, strict=True)])
+    with trace.span("digests.save"):
+        sources.save()
+
+    if apply and any(indexable for _, indexable in outcomes):
+        with trace.span("index.record"), index.update_index(inv_path, cached.data) as entries:
+            for (result, indexable), (ws_path, specs) in zip(outcomes, targets, strict=True):
+                if indexable:
+                    _record(entries, mode, identifier, ws_path, specs, result)
+
+    results = [result for result, _ in outcomes]
+    return {
+        "apply": apply,
+        "base": base,
+        mode.value: identifier,
+        "issue_iids": iids,
+        "summary": dict(sorted(Counter(_status(r) for r in results).items())),
+        "workspaces": results,
+    }
+
+
+def workspace_location(
+    mode: WorkspaceMode,
+    identifier: str,
+    issue_iid: int,
+) -> dict[str, Any]:
+    """Unified path resolution (index lookup, computed when the workspace is not indexed)."""
+    base_dir = Path.cwd()
+    inv_path = base_dir / ".wtplan.yml"
+    cached = load_inventory_cached(inv_path)
+    inv = cached.data
+    entry = index.lookup(index.load_index(inv_path, inv), index.workspace_key(mode.value, identifier, issue_iid))
+    if entry is not None:
+        p = entry["path"]
+    else:
+        preset = identifier if mode == WorkspaceMode.PRESET else None
+        repo = identifier if mode == WorkspaceMode.REPO else None
+        p = workspace_path(inv, base_dir, preset=preset, iid=issue_iid, repo=repo, paths=cached.paths)
+    result: dict[str, Any] = {
+        "path": str(p),
+        mode.value: identifier,
+        "issue_iid": issue_iid,
+    }
+    if mode == WorkspaceMode.REPO:
+        result["mode"] = "single_repo"
+    return result
+
+
+def _link_targets(inv: dict) -> tuple[str, ...]:
+    """links_repo_root targets relative to the primary worktree (materialized by wtplan, not user changes)."""
+    targets = []
+    for item in inv.get("links_repo_root") or []:
+        if isinstance(item, dict) and item.get("source"):
+            rel = os.path.normpath(str(item.get("target", Path(str(item["source"])).name)))
+            if not rel.startswith(".."):
+                targets.append(rel)
+    return tuple(targets)
+
+
+@trace.traced("workspace_remove")
+def workspace_remove(
+    mode: WorkspaceMode,
+    identifier: str,
+    issue_iid: int,
+    force: bool = False,
+    apply: bool = False,
+    jobs: int | None = None,
+) -> dict[str, Any]:
+    """Safely remove a workspace: every worktree is checked for dirty/unpushed/diverged/unknown state first.
+
+    Checks (and removals) run concurrently across repos. Without ``force`` nothing is
+    removed if any worktree is unsafe.
+    """
+    result: dict[str, Any] = {
+        "apply": apply,
+        "force": force,
+        mode.value: identifier,
+        "issue_iid": issue_iid,
+    }
+    if mode == WorkspaceMode.REPO:
+        result["mode"] = "single_repo"
+
+    base_dir = Path.cwd()
+    inv_path = base_dir / ".wtplan.yml"
+    cached = load_inventory_cached(inv_path)
+    key = index.workspace_key(mode.value, identifier, issue_iid)
+    entry = index.lookup(index.load_index(inv_path, cached.data), key)
+    if entry is not None:
+        ws_path = Path(entry["path"])
+        repos = [str(r) for r in entry.get("repos") or {}] or [ws_path.name]
+    else:
+        try:
+            ws_path, specs = _resolve_workspace(cached, base_dir, mode, identifier, issue_iid, None)
+        except KeyError as e:
+            return {"error": f"Unknown {mode.value}: {identifier}", "details": str(e)}
+        repos = [s.repo for s in specs]
+    ws_dir = ws_path.parent
+    result["workspace"] = str(ws_dir)
+
+    ignore = _link_targets(cached.data)
+    worktrees = [(r, ws_dir / r, bare_repo_path(cached.paths, r), ignore if r == ws_path.name else ()) for r in repos]
+    jobs = effective_jobs(cached.data, jobs)
+    checks = remove.check_worktrees(worktrees, jobs=jobs)
+    result["status"] = {c.repo: c.state for c in checks}
+    if not apply:
+        result["plan"] = [p.__dict__ for p in remove.plan_removal(checks, force=force)]
+        return result
+
+    done = remove.apply_removal(ws_dir, checks, force=force, jobs=jobs)
+    result["result"] = [p.__dict__ for p in done]
+    result["removed"] = not any(p.kind == "CONFLICT" for p in done)
+    if result["removed"] and entry is not None:
+        with index.update_index(inv_path, cached.data) as entries:
+            index.forget(entries, key)
+    return result
+
+
+@trace.traced("gc")
+def gc(
+    older_than_days: float | None = None, merged: bool = False, apply: bool = False, jobs: int | None = None
+) -> dict[str, Any]:
+    """Find stale issue workspaces (idle for ``older_than_days`` and/or with merged branches) and remove them.
+
+    Every candidate goes through the safe-remove checks; blocked ones are reported
+    and kept. Candidates are evaluated and removed concurrently, then each affected
+    bare repo gets one ``git worktree prune`` and ``git gc --auto``.
+    """
+    if older_than_days is None and not merged:
+        return {"error": "Nothing to select: give older_than_days and/or merged"}
+    inv_path = Path.cwd() / ".wtplan.yml"
+    try:
+        cached = load_inventory_cached(inv_path)
+    except FileNotFoundError:
+        return {"error": f"Inventory not found: {inv_path}. Run 'wtplan init' first."}
+    inv = cached.data
+    jobs = effective_jobs(inv, jobs)
+    now = time.time()
+    workspaces = fleet.scan_workspaces(inv, cached.paths, index.load_index(inv_path, inv))
+    bares = {r: bare_repo_path(cached.paths, r) for ws in workspaces for r in ws.repos}
+    ignore = _link_targets(inv)
+    with worker_pool(jobs, "wtplan-gc") as pool:
+        if merged:
+            ttl = fetch_ttl(inv)
+            resolve([pool.submit(reclaim.refresh, b, ttl) for b in sorted(set(bares.values())) if (b / "HEAD").exists()])
+        found = resolve(
+            [
+                pool.submit(reclaim.evaluate, ws, bares, now=now, older_than=older_than_days, merged=merged, ignore=ignore)
+                for ws in workspaces
+            ]
+        )
+    candidates = [c for c in found if c is not None]
+    removable = [c for c in candidates if not c.blocked]
+    result: dict[str, Any] = {
+        "apply": apply,
+        "older_than_days": older_than_days,
+        "merged": merged,
+        "summary": {
+            "candidates": len(candidates),
+            "blocked": len(candidates) - len(removable),
+            "reclaimable_bytes": sum(c.bytes for c in removable),
+        },
+        "workspaces": [c.to_dict(now) for c in candidates],
+    }
+    if not apply or not removable:
+        return result
+
+    with worker_pool(jobs, "wtplan-gc") as pool:
+        done = resolve(
+            [pool.submit(remove.apply_removal, c.ws.path.parent, c.checks, force=False, prune=False) for c in removable]
+        )
+        touched = sorted({b for c in removable for b in remove.existing_bares(c.checks)})
+        compacted = resolve([pool.submit(reclaim.compact, b) for b in touched])
+    removed = {c.ws.id for c, items in zip(removable, done, strict=True) if not any(p.kind == "CONFLICT" for p in items)}
+    for entry in result["workspaces"]:
+        entry["removed"] = entry["id"] in removed
+    result["summary"]["removed"] = len(removed)
+    result["summary"]["reclaimed_bytes"] = sum(c.bytes for c in removable if c.ws.id in removed)
+    result["bares"] = {b.name: state for b, state in zip(touched, compacted, strict=True)}
+    keys = [c.ws.key for c in removable if c.ws.id in removed and c.ws.key]
+    if keys:
+        with index.update_index(inv_path, inv) as entries:
+            for key in keys:
+                index.forget(entries, key)
+    return result
+
+
+def _workspace_links(ws: fleet.Workspace, targets: list[str], sources: list[usage.Scan]) -> list[tuple[str, int]]:
+    return [usage.link_cost(ws.path / t, src) for t, src in zip(targets, sources, strict=True)]
+
+
+@trace.traced("du")
+def du(jobs: int | None = None) -> dict[str, Any]:
+    """Disk usage of every workspace and bare repo, split into unique and shared (hard-linked) bytes.
+
+    Trees are walked concurrently and each inode is counted once. ``links`` gives,
+    per links_repo_root item, how many workspaces symlink, hard-link or copy it and
+    the bytes those targets hold, against the size of the toolbox source itself.
+    """
+    inv_path = Path.cwd() / ".wtplan.yml"
+    try:
+        cached = load_inventory_cached(inv_path)
+    except FileNotFoundError:
+        return {"error": f"Inventory not found: {inv_path}. Run 'wtplan init' first."}
+    inv = cached.data
+    workspaces = [ws for ws in fleet.scan_workspaces(inv, cached.paths, index.load_index(inv_path, inv)) if ws.exists]
+    try:
+        with os.scandir(cached.paths.bare_dir) as it:
+            bares = sorted(e.name for e in it if e.name.endswith(".git") and e.is_dir(follow_symlinks=False))
+    except FileNotFoundError:
+        bares = []
+    roots = {f"ws:{ws.id}": ws.path.parent for ws in workspaces} | {f"bare:{b}": cached.paths.bare_dir / b for b in bares}
+    items = [i for i in inv.get("links_repo_root") or [] if isinstance(i, dict) and i.get("source")]
+    targets = [str(i.get("target", Path(str(i["source"])).name)) for i in items]
+    toolbox = Path(str(inv.get("toolbox_dir") or "."))
+
+    with worker_pool(effective_jobs(inv, jobs), "wtplan-du") as pool:
+        scans = [pool.submit(usage.scan_tree, p) for p in roots.values()]
+        sources = resolve([pool.submit(usage.scan_tree, toolbox / str(i["source"])) for i in items])
+        links = resolve([pool.submit(_workspace_links, ws, targets, sources) for ws in workspaces])
+        scans = resolve(scans)
+    totals = usage.account(dict(zip(roots, scans, strict=True)))
+
+    ws_rows = [{"id": ws.id, "key": ws.key, **totals[f"ws:{ws.id}"].__dict__} for ws in workspaces]
+    bare_rows = [
+        {
+            "repo": b.removesuffix(".git"),
+            "worktrees": sum(1 for ws in workspaces if (ws.path.parent / b.removesuffix(".git") / ".git").exists()),
+            **totals[f"bare:{b}"].__dict__,
+        }
+        for b in bares
+    ]
+    link_rows = []
+    for n, item in enumerate(items):
+        kinds = Counter(per_ws[n][0] for per_ws in links)
+        link_rows.append(
+            {
+                "source": str(item["source"]),
+                "type": per_link_policy(item, cached.policy).type,
+                "symlinked": kinds.get("symlink", 0),
+                "hardlinked": kinds.get("hardlink", 0),
+                "copied": kinds.get("copy", 0),
+                "copy_bytes": sum(per_ws[n][1] for per_ws in links),
+                "source_bytes": sum(e[0] for e in sources[n].values()),
+            }
+        )
+    return {
+        "summary": {
+            "workspaces": len(ws_rows),
+            "unique_bytes": sum(r["unique_bytes"] for r in ws_rows),
+            "shared_bytes": sum(r["shared_bytes"] for r in ws_rows),
+            "bare_bytes": sum(r["unique_bytes"] + r["shared_bytes"] for r in bare_rows),
+        },
+        "workspaces": ws_rows,
+        "bares": bare_rows,
+        "links": link_rows,
+    }
+
+
+def init(toolbox_dir: str | None = None, config_path: str | None = None) -> dict[str, Any]:
+    """Initialize inventory, prepare bare repository, optionally enable toolbox."""
+    base = Path.cwd()
+    inv_path = Path(config_path) if config_path else base / ".wtplan.yml"
+    if not inv_path.exists():
+        ensure_inventory(base, toolbox_dir=toolbox_dir)
+    with update_inventory(inv_path) as inv:
+        if toolbox_dir and "toolbox_dir" not in inv:
+            inv["toolbox_dir"] = toolbox_dir
+    layout = init_workspace_layout(inv, base)
+    return {"inventory": str(inv_path), "layout": layout}
+
+
+@trace.traced("plan")
+def plan(workspace_id: str | None = None, all_workspaces: bool = False, jobs: int | None = None) -> dict[str, Any]:
+    """Summarize differences between inventory and actual state (create/delete/update).
+
+    Without arguments the links of the current directory are planned. ``all_workspaces``
+    plans every workspace under ``workspaces_dir`` (one summary line each) sharing
+    source scans and digests; ``workspace_id`` gives the full plan of one of them.
+    """
+    base = Path.cwd()
+    inv_path = base / ".wtplan.yml"
+    try:
+        cached = load_inventory_cached(inv_path)
+    except FileNotFoundError:
+        return {"error": f"Inventory not found: {inv_path}. Run 'wtplan init' first."}
+    if workspace_id is None and not all_workspaces:
+        items = [pi.__dict__ for pi in plan_links(cached.data, base, cached.policy)]
+        return {"links_repo_root": items}
+
+    workspaces = fleet.scan_workspaces(cached.data, cached.paths, index.load_index(inv_path, cached.data))
+    if workspace_id is not None:
+        workspaces = [ws for ws in workspaces if ws.id == workspace_id]
+        if not workspaces:
+            return {"error": f"Unknown workspace: {workspace_id}"}
+    sources = SourceCache(load_digests_cached(digest_cache_path(inv_path)))
+    with worker_pool(effective_jobs(cached.data, jobs), "wtplan-plan") as pool:
+        planned = resolve([pool.submit(fleet.plan_workspace, cached.data, ws, cached.policy, sources) for ws in workspaces])
+    sources.save()
+
+    if workspace_id is not None:
+        return {"status": fleet.status(planned[0]), "workspace": planned[0]}
+    summaries = [fleet.summarize(p) for p in planned]
+    return {
+        "summary": dict(sorted(Counter(s["status"] for s in summaries).items())),
+        "workspaces": summaries,
+    }
+
+
+def list_workspaces() -> dict[str, Any]:
+    """List indexed workspaces with their paths, created time and last apply state."""
+    inv_path = Path.cwd() / ".wtplan.yml"
+    try:
+        cached = load_inventory_cached(inv_path)
+    except FileNotFoundError:
+        return {"error": f"Inventory not found: {inv_path}. Run 'wtplan init' first."}
+    return {"workspaces": index.list_workspaces(index.load_index(inv_path, cached.data))}
@@ -0,0 +1,218 @@
+"""Opt-in timing spans for plan/apply phases (``WTPLAN_TRACE=1`` or ``wtplan --trace``).
+
+Disabled, :func:`span` returns a shared no-op object and :func:`count` is one
+ContextVar lookup. Enabled, every top-level tool call collects its spans, adds
+them to its JSON result under ``trace`` and writes them to a file:
+``.wtplan-trace.json`` (Chrome trace format, open in Perfetto or chrome://tracing)
+unless ``WTPLAN_TRACE`` names another file; a ``.jsonl`` name appends one span
+per line instead.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, TypeVar
+
+TRACE_ENV = "WTPLAN_TRACE"
+DEFAULT_TRACE_FILE = ".wtplan-trace.json"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_tracer: ContextVar[Tracer | None] = ContextVar("wtplan_tracer", default=None)
+_span: ContextVar[Span | None] = ContextVar("wtplan_span", default=None)
+
+
+def trace_target() -> Path | None:
+    """Trace file requested by ``WTPLAN_TRACE``; None when tracing is off."""
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if value.lower() in ("", "0", "false", "no", "off"):
+        return None
+    if value.lower() in ("1", "true", "yes", "on"):
+        return Path(DEFAULT_TRACE_FILE)
+    return Path(value)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoSpan:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def add(self, **counts: int) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Span:
+    """One timed phase with fixed ``labels``; ``add`` accumulates ``counts`` such as files and bytes."""
+
+    __slots__ = ("_token", "counts", "end", "id", "labels", "name", "parent", "start", "thread", "tid", "tracer")
+
+    def __init__(self, tracer: Tracer, name: str, labels: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+        self.counts: dict[str, int] = {}
+        self.id = 0
+        self.parent = 0
+        self.start = self.end = 0
+        self.tid = 0
+        self.thread = ""
+        self._token: Any = None
+
+    def __enter__(self) -> Span:
+        parent = _span.get()
+        self.parent = parent.id if parent is not None else 0
+        self.id = self.tracer.next_id()
+        self.tid = threading.get_native_id()
+        self.thread = threading.current_thread().name
+        self._token = _span.set(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.end = time.perf_counter_ns()
+        _span.reset(self._token)
+        self.tracer.finish(self)
+
+    def add(self, **counts: int) -> None:
+        with self.tracer.lock:
+            for k, v in counts.items():
+                self.counts[k] = self.counts.get(k, 0) + v
+
+
+class Tracer:
+    """Spans of one tool call, from any worker thread."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        self.spans: list[Span] = []
+        self._ids = 0
+
+    def next_id(self) -> int:
+        with self.lock:
+            self._ids += 1
+            return self._ids
+
+    def finish(self, span: Span) -> None:
+        with self.lock:
+            self.spans.append(span)
+
+    def _ms(self, ns: int) -> float:
+        return round(ns / 1e6, 3)
+
+    def records(self) -> list[dict[str, Any]]:
+        """Spans ordered by start: name, start/duration in ms, thread, parent and counters."""
+        return [
+            {
+                "name": s.name,
+                "start_ms": self._ms(s.start - self.origin),
+                "ms": self._ms(s.end - s.start),
+                "thread": s.thread,
+                "id": s.id,
+                "parent": s.parent,
+                **s.labels,
+                **s.counts,
+            }
+            for s in sorted(self.spans, key=lambda s: s.start)
+        ]
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Totals per span name: count, summed ms and summed counters."""
+        out: dict[str, dict[str, Any]] = {}
+        for s in self.spans:
+            row = out.setdefault(s.name, {"count": 0, "ms": 0.0})
+            row["count"] += 1
+            row["ms"] = round(row["ms"] + (s.end - s.start) / 1e6, 3)
+            for k, v in s.counts.items():
+                row[k] = row.get(k, 0) + v
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]["ms"]))
+
+    def write(self, path: Path) -> None:
+        records = self.records()
+        if path.suffix == ".jsonl":
+            with path.open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in records)
+            return
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "cat": "wtplan",
+                "ph": "X",
+                "ts": (s.start - self.origin) / 1e3,
+                "dur": (s.end - s.start) / 1e3,
+                "pid": pid,
+                "tid": s.tid,
+                "args": {**s.labels, **s.counts},
+            }
+            for s in self.spans
+        ]
+        threads = {s.tid: s.thread for s in self.spans}
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in threads.items()
+        ]
+        tmp = path.with_name(f".{path.name}.{pid}.tmp")
+        tmp.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def span(name: str, **labels: Any) -> Span | _NoSpan:
+    """Context manager timing ``name`` under the current span; a no-op unless tracing."""
+    tracer = _tracer.get()
+    if tracer is None:
+        return NO_SPAN
+    return Span(tracer, name, labels)
+
+
+def count(**counts: int) -> None:
+    """Add counters (files, bytes, entries...) to the innermost open span, if tracing."""
+    current = _span.get()
+    if current is not None:
+        current.add(**counts)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Trace a tool entry point: collect its spans, attach them to a dict result and write the trace file.
+
+    Nested traced calls only add a span to the outer trace.
+    """
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer.get() is not None:
+                with span(name):
+                    return fn(*args, **kwargs)
+            target = trace_target()
+            if target is None:
+                return fn(*args, **kwargs)
+            tracer = Tracer()
+            token = _tracer.set(tracer)
+            try:
+                with Span(tracer, name, {}):
+                    result = fn(*args, **kwargs)
+            finally:
+                _tracer.reset(token)
+            path = target if target.is_absolute() else Path.cwd() / target
+            tracer.write(path)
+            if isinstance(result, dict):
+                result["trace"] = {"file": str(path), "summary": tracer.summary(), "spans": tracer.records()}
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import stat
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+
+def walk(root: Path) -> Iterator[os.stat_result]:
+    """lstat of ``root`` and everything below it; symlinks are not followed."""
+    st = os.lstat(root)
+    yield st
+    if not stat.S_ISDIR(st.st_mode):
+        return
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        with it:
+            for e in it:
+                try:
+                    st = e.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                yield st
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(e.path)
+
+
+def allocated(st: os.stat_result) -> int:
+    """Bytes allocated on disk (sparse files and small files differ from ``st_size``)."""
+    return st.st_blocks * 512
+
+
+# per inode (dev, ino): [allocated bytes, st_nlink, links seen in the tree, is a directory, is a regular file]
+Scan = dict[tuple[int, int], list]
+
+
+def scan_tree(root: Path) -> Scan:
+    """Inodes under ``root``, each counted once however many hard links point at it."""
+    out: Scan = {}
+    try:
+        for st in walk(root):
+            entry = out.get((st.st_dev, st.st_ino))
+            if entry is None:
+                out[(st.st_dev, st.st_ino)] = [
+                    allocated(st),
+                    st.st_nlink,
+                    1,
+                    stat.S_ISDIR(st.st_mode),
+                    stat.S_ISREG(st.st_mode),
+                ]
+            else:
+                entry[2] += 1
+    except FileNotFoundError:
+        pass
+    return out
+
+
+@dataclass
+class Usage:
+    unique_bytes: int = 0  # freed by deleting this tree alone
+    shared_bytes: int = 0  # hard-linked from another tree or from outside everything scanned
+    files: int = 0
+
+
+def account(scans: dict[str, Scan]) -> dict[str, Usage]:
+    """Split the bytes of each named tree into unique and shared ones.
+
+    An inode is unique to a tree when every one of its hard links was seen in that
+    tree; directories always are. Reflinked (copy-on-write) extents cannot be told
+    apart with stat and show up as unique.
+    """
+    owners: dict[tuple[int, int], int] = {}
+    seen: dict[tuple[int, int], int] = {}
+    for scan in scans.values():
+        for key, entry in scan.items():
+            owners[key] = owners.get(key, 0) + 1
+            seen[key] = seen.get(key, 0) + entry[2]
+    out = {}
+    for name, scan in scans.items():
+        u = Usage()
+        for key, (size, nlink, _, is_dir, is_file) in scan.items():
+            if is_dir or (owners[key] == 1 and seen[key] >= nlink):
+                u.unique_bytes += size
+            else:
+                u.shared_bytes += size
+            u.files += is_file
+        out[name] = u
+    return out
+
+
+def reclaimable_bytes(root: Path) -> int:
+    """Disk freed by deleting ``root``: inodes with hard links outside the tree are not counted."""
+    return account({"": scan_tree(root)})[""].unique_bytes
+
+
+def link_cost(dst: Path, source: Scan | None = None) -> tuple[str, int]:
+    """How a links_repo_root target is materialized and the bytes only it holds.
+
+    "symlink", "missing", "hardlink" (every file is an inode of ``source``, the
+    scan of the toolbox item) or "copy".
+    """
+    if dst.is_symlink():
+        return "symlink", 0
+    if not dst.exists():
+        return "missing", 0
+    scan = scan_tree(dst)
+    files = {key for key, entry in scan.items() if entry[4]}
+    linked = source is not None and files and files <= source.keys()
+    return "hardlink" if linked else "copy", account({"": scan})[""].unique_bytes
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any
+
+DEFAULT_JOBS = 4
+# minimum seconds between per-file progress reports of one apply (per-repo/per-item reports are not throttled)
+PROGRESS_INTERVAL = 0.5
+
+# progress(subject, message): called from worker threads as long-running steps advance
+Progress = Callable[[str, str], None]
+
+
+class ApplyCancelledError(Exception):
+    """An apply was cancelled; work stops between files, each file is replaced atomically.
+
+    A link target the apply was creating is removed again; one it was updating keeps
+    the files already replaced until apply is re-run with the same flags.
+    """
+
+
+class Transfer:
+    """Running totals of an apply, shared by its worker threads, plus its cancellation flag."""
+
+    def __init__(
+        self,
+        progress: Progress | None = None,
+        cancel: threading.Event | None = None,
+        interval: float = PROGRESS_INTERVAL,
+    ) -> None:
+        self.progress = progress
+        self.cancel = cancel or threading.Event()
+        self.interval = interval
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._last = float("-inf")
+
+    def copied(self, size: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def check(self) -> None:
+        if self.cancel.is_set():
+            raise ApplyCancelledError
+
+    def report(self, subject: str, message: str) -> None:
+        if self.progress is not None:
+            self.progress(subject, f"{message} ({self.files} files, {self.bytes} bytes copied so far)")
+
+    def tick(self, subject: str, message: str) -> None:
+        """Per-file report, at most one every ``interval`` seconds across all worker threads."""
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last < self.interval:
+                return
+            self._last = now
+        self.report(subject, message)
+
+
+class InlineExecutor(Executor):
+    """Executor that runs each task immediately in the calling thread (jobs=1)."""
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+
+class _ContextThreadPool(ThreadPoolExecutor):
+    """Runs each task in a copy of the submitter's context, so trace spans follow the work."""
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@contextmanager
+def worker_pool(jobs: int | None, prefix: str = "wtplan") -> Iterator[Executor]:
+    """Bounded thread pool for ``jobs`` > 1, inline execution otherwise."""
+    if jobs is None or jobs <= 1:
+        yield InlineExecutor()
+        return
+    with _ContextThreadPool(max_workers=jobs, thread_name_prefix=prefix) as pool:
+        yield pool
+
+
+def effective_jobs(inv: dict, jobs: int | None) -> int:
+    """Explicit ``jobs``, else the inventory ``jobs`` setting, else DEFAULT_JOBS."""
+    if jobs:
+        return max(1, jobs)
+    return max(1, int(inv.get("jobs") or DEFAULT_JOBS))
+
+
+def resolve(slots: list[Any]) -> list[Any]:
+    """Replace futures in ``slots`` by their results, keeping submission order."""
+    return [s.result() if isinstance(s, Future) else s for s in slots]
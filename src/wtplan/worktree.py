@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from . import trace
+from .core import PlanItem
+from .fetch import DEFAULT_FETCH_TTL, record_fetch, scheduler
+from .git import GitError, add_worktree, ensure_bare, is_worktree
+from .inventory import InventoryPaths
+from .workers import Progress, resolve, worker_pool
+
+DEFAULT_BRANCH_FORMAT = "issue/{iid}"
+PARTIAL_CLONE_FILTERS = ("blob:none", "tree:0", "blob:limit=")
+
+
+@dataclass(frozen=True)
+class WorktreeSpec:
+    repo: str
+    url: str | None
+    bare: Path
+    path: Path
+    branch: str
+    base: str | None
+    sparse: tuple[str, ...] = ()
+    clone_filter: str | None = None
+
+
+def repo_config(inv: dict, repo: str) -> dict:
+    """Entry of the inventory ``repos`` mapping; a bare string is shorthand for ``{url: ...}``."""
+    cfg = (inv.get("repos") or {}).get(repo)
+    if isinstance(cfg, str):
+        return {"url": cfg}
+    return cfg if isinstance(cfg, dict) else {}
+
+
+def repo_url(inv: dict, repo: str) -> str | None:
+    """Clone URL for ``repo`` (``url`` or a local ``path``)."""
+    cfg = repo_config(inv, repo)
+    url = cfg.get("url") or cfg.get("path")
+    return str(url) if url else None
+
+
+def _profile_value(inv: dict, preset: str | None, repo: str, key: str) -> Any:
+    """Preset setting for ``repo``: a per-repo mapping entry, a preset-wide value, else the repo default."""
+    p = (inv.get("presets") or {}).get(preset) if preset else None
+    value = p.get(key) if isinstance(p, dict) else None
+    if isinstance(value, dict):
+        value = value.get(repo)
+    if value is None:
+        value = repo_config(inv, repo).get(key)
+    return value
+
+
+def sparse_patterns(inv: dict, preset: str | None, repo: str) -> tuple[str, ...]:
+    """Sparse-checkout cone directories (``sparse``) for ``repo``; empty means full checkout."""
+    value = _profile_value(inv, preset, repo, "sparse")
+    if isinstance(value, str):
+        value = [value]
+    return tuple(str(v) for v in value or ())
+
+
+def clone_filter(inv: dict, preset: str | None, repo: str) -> str | None:
+    """Partial-clone filter (``filter``) for ``repo``'s bare clone, e.g. ``blob:none``."""
+    value = _profile_value(inv, preset, repo, "filter")
+    return str(value) if value else None
+
+
+def bare_repo_path(paths: InventoryPaths, repo: str) -> Path:
+    """Shared bare clone for ``repo``; every issue worktree of the repo hangs off it."""
+    return paths.bare_dir / f"{repo}.git"
+
+
+def branch_name(inv: dict, iid: int) -> str:
+    return str(inv.get("branch_format") or DEFAULT_BRANCH_FORMAT).format(iid=iid)
+
+
+def worktree_specs(
+    inv: dict,
+    paths: InventoryPaths,
+    ws_dir: Path,
+    repos: list[str],
+    iid: int,
+    base: str | None,
+    preset: str | None = None,
+) -> list[WorktreeSpec]:
+    branch = branch_name(inv, iid)
+    return [
+        WorktreeSpec(
+            repo=r,
+            url=repo_url(inv, r),
+            bare=bare_repo_path(paths, r),
+            path=ws_dir / r,
+            branch=branch,
+            base=base or repo_config(inv, r).get("base"),
+            sparse=sparse_patterns(inv, preset, r),
+            clone_filter=clone_filter(inv, preset, r),
+        )
+        for r in repos
+    ]
+
+
+def plan_worktree(spec: WorktreeSpec) -> PlanItem:
+    if is_worktree(spec.path):
+        return PlanItem("NOOP", str(spec.path), "worktree exists")
+    if spec.url is None:
+        return PlanItem("CONFLICT", str(spec.path), f"no url configured for repo: {spec.repo}")
+    if spec.path.exists():
+        return PlanItem("CONFLICT", str(spec.path), "path exists and is not a worktree")
+    if spec.clone_filter and not spec.clone_filter.startswith(PARTIAL_CLONE_FILTERS):
+        return PlanItem("CONFLICT", str(spec.path), f"unsupported partial clone filter: {spec.clone_filter}")
+    if (spec.bare / "HEAD").exists():
+        source = "existing bare"
+    elif spec.clone_filter:
+        source = f"new bare clone of {spec.url}, filter {spec.clone_filter}"
+    else:
+        source = f"new bare clone of {spec.url}"
+    base = spec.base or "default branch"
+    detail = f"git worktree add {spec.branch} from {base} ({source})"
+    if spec.sparse:
+        detail += f", sparse: {' '.join(spec.sparse)}"
+    return PlanItem("ADD", str(spec.path), detail)
+
+
+def _noop_progress(subject: str, message: str) -> None:
+    pass
+
+
+_bare_locks: dict[Path, threading.Lock] = {}
+_bare_locks_guard = threading.Lock()
+
+
+def _bare_lock(bare: Path) -> threading.Lock:
+    """Serializes clone and ``worktree add`` per bare repo when several workspaces are applied at once."""
+    with _bare_locks_guard:
+        return _bare_locks.setdefault(bare.resolve(), threading.Lock())
+
+
+def apply_worktree(spec: WorktreeSpec, progress: Progress | None = None, fetch_ttl: float = DEFAULT_FETCH_TTL) -> PlanItem:
+    with trace.span("worktree", repo=spec.repo):
+        return _apply_worktree(spec, progress, fetch_ttl)
+
+
+def _apply_worktree(spec: WorktreeSpec, progress: Progress | None, fetch_ttl: float) -> PlanItem:
+    report = progress or _noop_progress
+    planned = plan_worktree(spec)
+    if planned.kind != "ADD":
+        report(spec.repo, planned.detail)
+        return planned
+    assert spec.url is not None
+    lock = _bare_lock(spec.bare)
+    try:
+        with lock:
+            cloned = not (spec.bare / "HEAD").exists()
+            if cloned:
+                report(spec.repo, f"cloning bare {spec.url}")
+                ensure_bare(spec.url, spec.bare, spec.clone_filter)
+                record_fetch(spec.bare)
+        if not cloned:
+            report(spec.repo, "fetching")
+            report(spec.repo, f"fetch: {scheduler.fetch(spec.bare, ttl=fetch_ttl)}")
+        report(spec.repo, f"adding worktree {spec.branch}")
+        with lock:
+            start = add_worktree(spec.bare, spec.path, spec.branch, spec.base, spec.sparse)
+    except GitError as e:
+        report(spec.repo, "failed")
+        return PlanItem("CONFLICT", str(spec.path), str(e))
+    report(spec.repo, "done")
+    return PlanItem("ADD", str(spec.path), f"worktree {spec.branch} from {start}")
+
+
+def apply_worktrees(
+    specs: list[WorktreeSpec], *, jobs: int = 1, progress: Progress | None = None, fetch_ttl: float = DEFAULT_FETCH_TTL
+) -> list[PlanItem]:
+    """Create all worktrees of a workspace, running up to ``jobs`` repos at once; results keep ``specs`` order."""
+    with worker_pool(jobs, "wtplan-git") as pool:
+        return resolve([pool.submit(apply_worktree, s, progress, fetch_ttl) for s in specs])
@@ -1,14 +1,22 @@
 """Test configuration for wtplan tests."""
 
+import functools
 import os
 import shutil
+import subprocess
 import tempfile
 from pathlib import Path
 
+import anyio
 import pytest
 import yaml
 
 
+def call_tool(tool, **kwargs):
+    """Run an async MCP tool function to completion."""
+    return anyio.run(functools.partial(tool, **kwargs))
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_environment():
     """Set up test environment with temporary inventory file."""
@@ -46,3 +54,53 @@ def setup_test_environment():
     # Cleanup
     os.chdir(original_cwd)
     shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _git(*args, cwd=None):
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": "t",
+        "GIT_AUTHOR_EMAIL": "t@example.com",
+        "GIT_COMMITTER_NAME": "t",
+        "GIT_COMMITTER_EMAIL": "t@example.com",
+    }
+    subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True)
+
+
+@pytest.fixture
+def make_origin(tmp_path):
+    """Factory creating a local git repository with one commit on main."""
+
+    def _make(name: str = "app", files: dict[str, str] | None = None) -> Path:
+        repo = tmp_path / "origin" / name
+        repo.mkdir(parents=True)
+        _git("init", "--quiet", "-b", "main", cwd=repo)
+        for rel, text in (files or {"README.md": f"# {name}\n"}).items():
+            (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+            (repo / rel).write_text(text)
+        _git("add", "-A", cwd=repo)
+        _git("commit", "--quiet", "-m", "init", cwd=repo)
+        return repo
+
+    return _make
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch, make_origin):
+    """Project root (and cwd) with origins app/lib, a ``web`` preset and a toolbox ``.env`` link."""
+    app = make_origin("app")
+    lib = make_origin("lib")
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "toolbox").mkdir()
+    (root / "toolbox" / ".env").write_text("KEY=1\n")
+    inv = {
+        "version": 1,
+        "toolbox_dir": str(root / "toolbox"),
+        "repos": {"app": {"url": str(app)}, "lib": str(lib)},
+        "presets": {"web": {"primary_repo": "app", "repos": ["app", "lib"]}},
+        "links_repo_root": [{"source": ".env"}],
+    }
+    (root / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    monkeypatch.chdir(root)
+    return root
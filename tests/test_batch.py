@@ -0,0 +1,55 @@
+"""Tests for batch workspace provisioning (preset add-many / preset_add_batch)."""
+
+import yaml
+from conftest import call_tool
+from typer.testing import CliRunner
+
+from wtplan import digests, mcp_server, tools
+from wtplan.cli import app
+
+
+def test_batch_apply_shares_sources_and_indexes_once(project, monkeypatch):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    hashed = []
+    real_digest = digests.file_digest
+    monkeypatch.setattr(digests, "file_digest", lambda p: hashed.append(p) or real_digest(p))
+
+    iids = [21, 22, 23, 24]
+    res = tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [*iids, 21], apply=True, jobs=3)
+    assert res["issue_iids"] == iids
+    assert res["summary"] == {"ok": len(iids)}
+    assert len(hashed) == 1
+    assert sorted(p.name for p in (project / "bare").iterdir()) == ["app.git", "lib.git"]
+    listed = call_tool(mcp_server.tool_list)["workspaces"]
+    assert [w["issue_iid"] for w in listed] == iids
+    assert all((project / "worktrees" / f"APP_ISSUE_{i:04d}" / "app" / ".env").is_file() for i in iids)
+
+
+def test_batch_unknown_preset(project):
+    res = call_tool(mcp_server.tool_preset_add_batch, preset="nope", issue_iids=[1, 2])
+    assert res["error"] == "Unknown preset: nope"
+
+
+def test_cli_add_many_from_file(project):
+    (project / "iids.txt").write_text("31\n# skipped\n\n32\n")
+    result = CliRunner().invoke(app, ["preset", "add-many", "web", "30", "--from-file", "iids.txt"])
+    assert result.exit_code == 0
+    assert '"issue_iids": [\n    30,\n    31,\n    32\n  ]' in result.stdout
+
+
+def test_batch_failure_of_one_workspace_keeps_the_others(project, monkeypatch):
+    real_apply_links = tools.apply_links
+
+    def flaky_apply_links(inv, ws_path, *args, **kwargs):
+        if ws_path.parent.name == "APP_ISSUE_0026":
+            raise OSError("disk full")
+        return real_apply_links(inv, ws_path, *args, **kwargs)
+
+    monkeypatch.setattr(tools, "apply_links", flaky_apply_links)
+    res = tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [25, 26, 27], apply=True, jobs=2)
+    assert res["summary"] == {"error": 1, "ok": 2}
+    failed = res["workspaces"][1]
+    assert (failed["issue_iid"], failed["error"]) == (26, "OSError: disk full")
+    assert [w["issue_iid"] for w in call_tool(mcp_server.tool_list)["workspaces"]] == [25, 27]
@@ -38,6 +38,12 @@ class TestCLIHelp:
         assert result.exit_code == 0
         assert "toolbox" in result.output
 
+    def test_list_help(self):
+        """Test list command help."""
+        result = runner.invoke(app, ["list", "--help"])
+        assert result.exit_code == 0
+        assert "indexed workspaces" in result.output
+
     def test_completion_help(self):
         """Test completion command help."""
         result = runner.invoke(app, ["completion", "--help"])
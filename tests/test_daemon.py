@@ -0,0 +1,77 @@
+"""Tests for the optional daemon and the client fast path."""
+
+import socket
+import sys
+import threading
+
+import pytest
+import yaml
+
+from wtplan import client, tools
+from wtplan.daemon import DaemonRunningError, DaemonServer
+from wtplan.tools import WorkspaceMode
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    inv = {"version": 1, "presets": {"web": {"primary_repo": "app", "repos": ["app"]}}}
+    (tmp_path / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def server(base):
+    srv = DaemonServer(base)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+
+
+def test_daemon_answers_like_in_process(base, server):
+    res = client.request(base, "path", mode="preset", identifier="web", issue_iid=4)
+    assert res == tools.workspace_location(WorkspaceMode.PRESET, "web", 4)
+    assert client.request(base, "list") == tools.list_workspaces()
+    assert client.request(base, "plan") == tools.plan()
+
+
+def test_request_falls_back_without_daemon(base):
+    assert client.request(base, "list") is None
+    (base / client.SOCKET_NAME).touch()
+    assert client.request(base, "list") is None
+
+
+def test_failed_request_falls_back(base, server):
+    assert client.request(base, "path", mode="preset", identifier="nope", issue_iid=1) is None
+    assert client.request(base, "bogus") is None
+
+
+def test_second_daemon_is_refused_and_stale_socket_reclaimed(base, server):
+    with pytest.raises(DaemonRunningError):
+        DaemonServer(base)
+
+    server.shutdown()
+    server.server_close()
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(client.socket_path(base)))
+    stale.close()
+    DaemonServer(base).server_close()
+    assert not client.socket_path(base).exists()
+
+
+def test_fast_path_prints_path(base, server, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["wtplan", "preset", "path", "web", "4"])
+    client.main()
+    assert capsys.readouterr().out.strip() == tools.workspace_location(WorkspaceMode.PRESET, "web", 4)["path"]
+
+
+def test_fast_path_only_for_forwardable_commands():
+    assert client._fast_request(["repo", "path", "app", "12"]) == (
+        "path",
+        {"mode": "repo", "identifier": "app", "issue_iid": 12},
+    )
+    assert client._fast_request(["preset", "add", "web", "1"]) is None
+    assert client._fast_request(["repo", "path", "app", "x"]) is None
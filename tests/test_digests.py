@@ -0,0 +1,113 @@
+"""Tests for the on-disk toolbox digest cache."""
+
+import os
+import time
+
+import pytest
+import yaml
+
+from wtplan import digests, tools
+from wtplan.digests import DigestCache
+from wtplan.sync import file_digest
+
+OLD = time.time() - 3600
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    hashed = []
+    monkeypatch.setattr(digests, "file_digest", lambda p: hashed.append(p.name) or file_digest(p))
+    return hashed
+
+
+def _old_file(path, text):
+    path.write_text(text)
+    os.utime(path, (OLD, OLD))
+    return path
+
+
+def test_digest_persists_across_instances(tmp_path, counted):
+    f = _old_file(tmp_path / "a.txt", "alpha")
+    cache = DigestCache.load(tmp_path / "d.json")
+    first = cache.digest(f)
+    cache.save()
+
+    assert DigestCache.load(tmp_path / "d.json").digest(f) == first == file_digest(f)
+    assert counted == ["a.txt"]
+
+
+def test_changed_stat_key_is_rehashed(tmp_path, counted):
+    f = _old_file(tmp_path / "a.txt", "alpha")
+    cache = DigestCache.load(tmp_path / "d.json")
+    cache.digest(f)
+    cache.save()
+
+    _old_file(f, "ALPHA")
+    os.utime(f, (OLD + 1, OLD + 1))
+    assert DigestCache.load(tmp_path / "d.json").digest(f) == file_digest(f)
+    assert counted == ["a.txt", "a.txt"]
+
+
+def test_recently_modified_files_are_not_cached(tmp_path, counted):
+    f = tmp_path / "fresh.txt"
+    f.write_text("new")
+    cache = DigestCache.load(tmp_path / "d.json")
+    cache.digest(f)
+    cache.save()
+
+    assert not (tmp_path / "d.json").exists()
+    DigestCache.load(tmp_path / "d.json").digest(f)
+    assert counted == ["fresh.txt", "fresh.txt"]
+
+
+def test_save_merges_and_drops_deleted_files(tmp_path):
+    a = _old_file(tmp_path / "a.txt", "alpha")
+    b = _old_file(tmp_path / "b.txt", "beta")
+    one, two = DigestCache.load(tmp_path / "d.json"), DigestCache.load(tmp_path / "d.json")
+    one.digest(a)
+    two.digest(b)
+    one.save()
+    two.save()
+    assert sorted(digests._read(tmp_path / "d.json")) == [str(a), str(b)]
+
+    a.unlink()
+    three = DigestCache.load(tmp_path / "d.json")
+    three.digest(_old_file(tmp_path / "c.txt", "gamma"))
+    three.save()
+    assert sorted(digests._read(tmp_path / "d.json")) == [str(b), str(tmp_path / "c.txt")]
+
+
+def test_cached_instance_is_reused_and_refreshed_from_other_writers(tmp_path, counted, monkeypatch):
+    path = tmp_path / "d.json"
+    a = _old_file(tmp_path / "a.txt", "alpha")
+    warm = digests.load_digests_cached(path)
+    warm.digest(a)
+    warm.save()
+    reads = []
+    real_read = digests._read
+    monkeypatch.setattr(digests, "_read", lambda p: reads.append(p) or real_read(p))
+
+    assert digests.load_digests_cached(path) is warm
+    assert reads == []  # unchanged file: one stat, no re-read
+
+    b = _old_file(tmp_path / "b.txt", "beta")
+    other = DigestCache.load(path)  # another process
+    other.digest(b)
+    other.save()
+    assert digests.load_digests_cached(path).digest(b) == file_digest(b)
+    assert counted == ["a.txt", "b.txt"]
+
+
+def test_toolbox_digests_are_reused_across_calls(project, monkeypatch):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    os.utime(project / "toolbox" / ".env", (1_000_000_000, 1_000_000_000))
+    hashed = []
+    real_digest = digests.file_digest
+    monkeypatch.setattr(digests, "file_digest", lambda p: hashed.append(p) or real_digest(p))
+
+    tools.workspace_add(tools.WorkspaceMode.PRESET, "web", 41, apply=True)
+    tools.workspace_add(tools.WorkspaceMode.PRESET, "web", 42, apply=True)
+    assert hashed == [project / "toolbox" / ".env"]
+    assert (project / ".wtplan-digests.json").is_file()
@@ -0,0 +1,44 @@
+"""Tests for hard-link aware disk usage accounting."""
+
+import os
+
+import yaml
+from conftest import call_tool
+
+from wtplan import mcp_server, tools
+
+
+def test_du_counts_hard_linked_files_once(project):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [81, 82], apply=True)
+    ws = project / "worktrees"
+    size = 65536
+    (ws / "APP_ISSUE_0081" / "app" / "big.bin").write_bytes(b"x" * size)
+    os.link(ws / "APP_ISSUE_0081" / "app" / "big.bin", ws / "APP_ISSUE_0082" / "app" / "big.bin")
+
+    res = call_tool(mcp_server.tool_du)
+    rows = {w["id"]: w for w in res["workspaces"]}
+    assert rows["APP_ISSUE_0081"]["shared_bytes"] >= size
+    assert rows["APP_ISSUE_0081"]["shared_bytes"] == rows["APP_ISSUE_0082"]["shared_bytes"]
+    assert res["summary"]["shared_bytes"] == 2 * rows["APP_ISSUE_0081"]["shared_bytes"]
+    assert [(b["repo"], b["worktrees"]) for b in res["bares"]] == [("app", 2), ("lib", 2)]
+    assert all(b["unique_bytes"] > 0 for b in res["bares"])
+    link = res["links"][0]
+    assert (link["type"], link["copied"], link["symlinked"]) == ("copy", 2, 0)
+    assert link["copy_bytes"] > 0
+    assert link["source_bytes"] > 0
+
+
+def test_du_counts_hardlinked_links_separately(project):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "hardlink"}, {"source": ".env", "target": "copy.env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    tools.workspace_add_batch(tools.WorkspaceMode.REPO, "app", [83, 84], apply=True)
+
+    hardlinked, copied = tools.du()["links"]
+    assert (hardlinked["type"], hardlinked["hardlinked"], hardlinked["copied"]) == ("hardlink", 2, 0)
+    assert hardlinked["copy_bytes"] == 0
+    assert (copied["type"], copied["hardlinked"], copied["copied"]) == ("copy", 0, 2)
+    assert copied["copy_bytes"] > 0
@@ -0,0 +1,57 @@
+"""Tests for the copy backend used by copy-mode links."""
+
+import errno
+from pathlib import Path
+
+import pytest
+
+from wtplan import fastcopy
+from wtplan.core import apply_links
+from wtplan.policy import LinkPolicy
+
+
+@pytest.fixture
+def payload(tmp_path: Path) -> Path:
+    src = tmp_path / "model.bin"
+    src.write_bytes(bytes(range(256)) * 4096)
+    return src
+
+
+def _unsupported(*args):
+    raise OSError(errno.EOPNOTSUPP, "not supported")
+
+
+def test_copy_file_reports_strategy(payload, tmp_path):
+    dst = tmp_path / "out.bin"
+    strategy = fastcopy.copy_file(payload, dst)
+    assert strategy in {name for name, _ in fastcopy.STRATEGIES}
+    assert dst.read_bytes() == payload.read_bytes()
+    assert dst.stat().st_mtime_ns == payload.stat().st_mtime_ns
+
+
+def test_falls_back_to_userspace_copy(payload, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        fastcopy,
+        "STRATEGIES",
+        (("reflink", lambda *a: False), ("copy_file_range", lambda *a: False), ("copy", fastcopy._userspace)),
+    )
+    dst = tmp_path / "out.bin"
+    assert fastcopy.copy_file(payload, dst) == "copy"
+    assert dst.read_bytes() == payload.read_bytes()
+
+
+def test_unsupported_errno_is_not_fatal(payload, tmp_path, monkeypatch):
+    monkeypatch.setattr(fastcopy, "fcntl", None)
+    monkeypatch.setattr(fastcopy.os, "copy_file_range", _unsupported, raising=False)
+    dst = tmp_path / "out.bin"
+    assert fastcopy.copy_file(payload, dst) in {"sendfile", "copy"}
+    assert dst.read_bytes() == payload.read_bytes()
+
+
+def test_apply_result_names_strategy(payload, tmp_path):
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    inv = {"toolbox_dir": str(tmp_path), "links_repo_root": [{"source": "model.bin"}]}
+    out = apply_links(inv, ws, LinkPolicy(type="copy"))
+    assert len(out) == 1
+    assert out[0].detail.startswith("copied file (")
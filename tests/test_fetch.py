@@ -0,0 +1,53 @@
+"""Tests for the fetch scheduler shared by worktree creation."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from wtplan.fetch import FetchScheduler, fetch_ttl, last_fetch
+
+
+def _bare(tmp_path):
+    bare = tmp_path / "app.git"
+    bare.mkdir()
+    return bare
+
+
+def test_concurrent_requests_merge_into_one_fetch(tmp_path):
+    bare = _bare(tmp_path)
+    calls = []
+    started = threading.Event()
+
+    def slow_fetch(path):
+        calls.append(path)
+        started.set()
+        time.sleep(0.2)
+
+    sched = FetchScheduler(fetcher=slow_fetch)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        first = pool.submit(sched.fetch, bare, ttl=0)
+        started.wait()
+        rest = [pool.submit(sched.fetch, bare, ttl=0) for _ in range(7)]
+        statuses = [first.result()] + [f.result() for f in rest]
+
+    assert len(calls) == 1
+    assert statuses == ["fetched"] + ["joined"] * 7
+
+
+def test_fresh_fetch_is_skipped_and_recorded(tmp_path):
+    bare = _bare(tmp_path)
+    calls = []
+    sched = FetchScheduler(fetcher=calls.append)
+
+    assert sched.fetch(bare, ttl=60) == "fetched"
+    assert last_fetch(bare) is not None
+    assert sched.fetch(bare, ttl=60) == "fresh"
+    # the record is on disk, so another scheduler (process) sees it too
+    assert FetchScheduler(fetcher=calls.append).fetch(bare, ttl=60) == "fresh"
+    assert sched.fetch(bare, ttl=0) == "fetched"
+    assert calls == [bare.resolve(), bare.resolve()]
+
+
+def test_fetch_ttl_from_inventory():
+    assert fetch_ttl({"fetch_ttl": 0}) == 0
+    assert fetch_ttl({}) > 0
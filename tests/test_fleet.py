@@ -0,0 +1,58 @@
+"""Tests for the fleet-wide plan across all workspaces."""
+
+import yaml
+from conftest import call_tool
+
+from wtplan import mcp_server, tools
+from wtplan.git import run_git
+
+
+def test_fleet_plan_summarizes_every_workspace(project):
+    tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [51, 52, 53], apply=True)
+    ws = project / "worktrees"
+    (ws / "APP_ISSUE_0052" / "app" / ".env").unlink()
+    run_git(["--git-dir", str(project / "bare" / "lib.git"), "worktree", "remove", str(ws / "APP_ISSUE_0053" / "lib")])
+    (ws / "LIB_ISSUE_0009" / "lib").mkdir(parents=True)
+
+    res = call_tool(mcp_server.tool_plan, all_workspaces=True)
+    status = {w["id"]: w["status"] for w in res["workspaces"]}
+    assert status == {
+        "APP_ISSUE_0051": "ok",
+        "APP_ISSUE_0052": "drift",
+        "APP_ISSUE_0053": "drift",
+        "LIB_ISSUE_0009": "conflict",
+    }
+    assert res["summary"] == {"conflict": 1, "drift": 2, "ok": 1}
+    assert res["workspaces"][0]["key"] == "preset/web/51"
+
+    detail = tools.plan(workspace_id="APP_ISSUE_0053")
+    assert detail["workspace"]["repos"] == {"app": "worktree", "lib": "missing"}
+    assert tools.plan(workspace_id="NOPE")["error"] == "Unknown workspace: NOPE"
+
+
+def test_fleet_plan_sees_edits_inside_copied_links(project):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [54, 55], apply=True)
+    (project / "worktrees" / "APP_ISSUE_0055" / "app" / ".env").write_text("KEY=edited\n")
+
+    res = tools.plan(all_workspaces=True)
+    assert {w["id"]: w["status"] for w in res["workspaces"]} == {"APP_ISSUE_0054": "ok", "APP_ISSUE_0055": "conflict"}
+    assert res["workspaces"][1]["links"] == {"CONFLICT": 1}
+
+
+def test_fleet_plan_reports_source_edit_as_drift(project):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [56, 57], apply=True)
+    (project / "toolbox" / ".env").write_text("KEY=2\n")
+    (project / "worktrees" / "APP_ISSUE_0057" / "app" / ".env").write_text("KEY=edited\n")
+
+    res = tools.plan(all_workspaces=True)
+    assert {w["id"]: w["status"] for w in res["workspaces"]} == {"APP_ISSUE_0056": "drift", "APP_ISSUE_0057": "conflict"}
+
+    tools.workspace_add(tools.WorkspaceMode.PRESET, "web", 56, apply=True)
+    assert (project / "worktrees" / "APP_ISSUE_0056" / "app" / ".env").read_text() == "KEY=2\n"
+    assert (project / "worktrees" / "APP_ISSUE_0057" / "app" / ".env").read_text() == "KEY=edited\n"
@@ -0,0 +1,61 @@
+"""Tests for garbage collection of idle and merged issue workspaces."""
+
+import os
+import time
+from pathlib import Path
+
+import yaml
+from conftest import call_tool
+
+from wtplan import mcp_server, tools
+from wtplan.git import run_git
+
+
+def _age(ws, days):
+    """Backdate a workspace, its worktrees and their git admin dirs by ``days``."""
+    when = time.time() - days * 86400
+    for wt in [p for p in ws.iterdir() if p.is_dir()]:
+        gitdir = Path((wt / ".git").read_text().removeprefix("gitdir:").strip())
+        for p in [wt, *gitdir.rglob("*"), gitdir]:
+            os.utime(p, (when, when), follow_symlinks=False)
+    os.utime(ws, (when, when))
+
+
+def test_gc_removes_idle_workspaces_and_keeps_dirty_ones(project):
+    tools.workspace_add_batch(tools.WorkspaceMode.PRESET, "web", [71, 72, 73], apply=True)
+    ws = project / "worktrees"
+    (ws / "APP_ISSUE_0072" / "lib" / "wip.txt").write_text("wip\n")
+    for iid in (71, 72):
+        _age(ws / f"APP_ISSUE_{iid:04d}", 40)
+
+    res = call_tool(mcp_server.tool_gc, older_than_days=30)
+    assert [(w["id"], w["action"]) for w in res["workspaces"]] == [("APP_ISSUE_0071", "remove"), ("APP_ISSUE_0072", "blocked")]
+    assert res["workspaces"][0]["reasons"] == ["idle 40d"]
+    assert res["summary"]["reclaimable_bytes"] == res["workspaces"][0]["bytes"] > 0
+    assert (ws / "APP_ISSUE_0071").is_dir()
+
+    res = tools.gc(older_than_days=30, apply=True, jobs=2)
+    assert res["summary"]["removed"] == 1
+    assert res["bares"] == {"app.git": "ok", "lib.git": "ok"}
+    assert sorted(p.name for p in ws.iterdir()) == ["APP_ISSUE_0072", "APP_ISSUE_0073"]
+    assert [w["issue_iid"] for w in call_tool(mcp_server.tool_list)["workspaces"]] == [72, 73]
+
+
+def test_gc_selects_merged_branches(project, tmp_path):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["fetch_ttl"] = 0
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    tools.workspace_add_batch(tools.WorkspaceMode.REPO, "app", [74, 75], apply=True)
+    wt = project / "worktrees" / "APP_ISSUE_0074" / "app"
+    env = ["-c", "user.name=t", "-c", "user.email=t@example.com"]
+    (wt / "fix.txt").write_text("fix\n")
+    run_git(["add", "fix.txt"], cwd=wt)
+    run_git([*env, "commit", "-q", "-m", "fix"], cwd=wt)
+    run_git(["push", "-q", "origin", "issue/74"], cwd=wt)
+    run_git([*env, "merge", "-q", "--no-ff", "-m", "merge", "issue/74"], cwd=tmp_path / "origin" / "app")
+
+    res = tools.gc(merged=True, apply=True)
+    assert [(w["id"], w["reasons"], w["removed"]) for w in res["workspaces"]] == [("APP_ISSUE_0074", ["merged"], True)]
+    assert not wt.exists()
+    assert (project / "worktrees" / "APP_ISSUE_0075" / "app").is_dir()
+    assert tools.gc()["error"].startswith("Nothing to select")
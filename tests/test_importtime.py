@@ -0,0 +1,35 @@
+"""Import-time budget for the CLI (``repo path`` runs in shell prompt hooks)."""
+
+import subprocess
+import sys
+
+# generous enough for slow CI runners; importing FastMCP alone costs several times this
+IMPORT_BUDGET_US = 500_000
+HEAVY_MODULES = ("mcp", "pydantic", "starlette", "anyio", "uvicorn")
+
+
+def _importtime(module: str) -> dict[str, int]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line.removeprefix("import time:").split("|")
+        cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+def test_cli_does_not_import_mcp():
+    loaded = _importtime("wtplan.cli")
+    heavy = sorted(m for m in loaded if m.split(".")[0] in HEAVY_MODULES)
+    assert heavy == []
+
+
+def test_cli_import_within_budget():
+    loaded = _importtime("wtplan.cli")
+    assert loaded["wtplan.cli"] < IMPORT_BUDGET_US
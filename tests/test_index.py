@@ -0,0 +1,109 @@
+"""Tests for the workspace index and 'wtplan list'."""
+
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+from conftest import call_tool
+
+from wtplan import index, mcp_server, tools
+
+
+def test_apply_indexes_workspace_for_path_and_list(project, monkeypatch):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=11, apply=True)
+
+    listed = call_tool(mcp_server.tool_list)["workspaces"]
+    assert [w["key"] for w in listed] == ["preset/web/11"]
+    entry = listed[0]
+    assert entry["id"] == "APP_ISSUE_0011"
+    assert set(entry["repos"]) == {"app", "lib"}
+    assert entry["last_apply"]["status"] == "ok"
+
+    def _no_compute(*args, **kwargs):
+        raise AssertionError("path recomputed")
+
+    monkeypatch.setattr(tools, "workspace_path", _no_compute)
+    assert call_tool(mcp_server.tool_preset_path, preset="web", issue_iid=11)["path"] == entry["path"]
+
+
+def test_reapply_keeps_created_time(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=12, apply=True)
+    created = call_tool(mcp_server.tool_list)["workspaces"][0]["created"]
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=12, apply=True)
+    assert call_tool(mcp_server.tool_list)["workspaces"][0]["created"] == created
+
+
+def test_failed_workspace_is_not_indexed(project):
+    call_tool(mcp_server.tool_repo_add, repo="unknown", issue_iid=1, apply=True)
+    assert call_tool(mcp_server.tool_list)["workspaces"] == []
+
+
+def test_cancelled_apply_is_not_indexed(project):
+    cancel = threading.Event()
+    cancel.set()
+    res = tools.workspace_add(tools.WorkspaceMode.PRESET, "web", 13, apply=True, cancel=cancel)
+    assert res["cancelled"] is True
+    assert not (project / "bare").exists()
+    assert call_tool(mcp_server.tool_list)["workspaces"] == []
+
+
+def test_unknown_link_type_does_not_break_path_and_list(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=14, apply=True)
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["default_policy"] = {"links_repo_root": {"type": "rsync"}}
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+
+    assert [w["issue_iid"] for w in call_tool(mcp_server.tool_list)["workspaces"]] == [14]
+    assert call_tool(mcp_server.tool_preset_path, preset="web", issue_iid=14)["path"].endswith("APP_ISSUE_0014/app")
+    assert tools.du()["links"][0]["type"] == "rsync"
+    planned = tools.plan(workspace_id="APP_ISSUE_0014")
+    assert planned["status"] == "conflict"
+
+
+def test_apply_leaves_inventory_untouched(project):
+    inv_path = project / ".wtplan.yml"
+    text = "# committed config\n" + inv_path.read_text() + "extra: {flow: [1, 2]}  # keep me\n"
+    inv_path.write_text(text)
+
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=15, apply=True)
+    assert inv_path.read_text() == text
+    stored = json.loads((project / index.INDEX_FILE).read_text())
+    assert list(stored["workspaces"]) == ["preset/web/15"]
+
+    call_tool(mcp_server.tool_preset_rm, preset="web", issue_iid=15, apply=True)
+    assert inv_path.read_text() == text
+    assert json.loads((project / index.INDEX_FILE).read_text())["workspaces"] == {}
+
+
+def test_legacy_inventory_index_is_imported_once(project):
+    inv_path = project / ".wtplan.yml"
+    inv = yaml.safe_load(inv_path.read_text())
+    inv["workspaces"] = {"preset/web/1": {"mode": "preset", "preset": "web", "issue_iid": 1, "path": "/old/APP_ISSUE_0001/app"}}
+    inv_path.write_text(yaml.safe_dump(inv))
+    assert [w["key"] for w in call_tool(mcp_server.tool_list)["workspaces"]] == ["preset/web/1"]
+
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=16, apply=True)
+    with index.update_index(inv_path) as entries:
+        index.forget(entries, "preset/web/1")
+    assert [w["key"] for w in call_tool(mcp_server.tool_list)["workspaces"]] == ["preset/web/16"]
+
+
+def _index_many(inv_path: str, prefix: str, n: int) -> None:
+    for i in range(n):
+        with index.update_index(Path(inv_path)) as entries:
+            entries[f"{prefix}/{i}"] = {"path": f"/w/{prefix}/{i}"}
+
+
+def test_concurrent_index_updates_are_not_lost(tmp_path):
+    inv_path = tmp_path / ".wtplan.yml"
+    n = 10
+    with ProcessPoolExecutor(max_workers=2) as procs, ThreadPoolExecutor(max_workers=4) as threads:
+        futures = [procs.submit(_index_many, str(inv_path), f"p{i}", n) for i in range(2)]
+        futures += [threads.submit(_index_many, str(inv_path), f"t{i}", n) for i in range(4)]
+        for f in futures:
+            f.result()
+
+    assert len(index.load_index(inv_path)) == 6 * n
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".wtplan-index.json", ".wtplan.yml.lock"]
@@ -1,7 +1,19 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
+import yaml
+
+from wtplan import inventory
 from wtplan.core import ensure_inventory
-from wtplan.inventory import load_inventory
+from wtplan.inventory import (
+    InventoryCache,
+    InventoryConflictError,
+    inventory_stamp,
+    load_inventory,
+    update_inventory,
+    write_inventory,
+)
 
 
 def test_ensure_inventory(tmp_path: Path):
@@ -11,3 +23,94 @@ def test_ensure_inventory(tmp_path: Path):
     inv = load_inventory(cwd / ".wtplan.yml")
     assert inv["version"] == 1
     assert "default_policy" in inv
+
+
+def test_inventory_cache_revalidates_on_change(tmp_path: Path, monkeypatch):
+    ensure_inventory(tmp_path)
+    path = tmp_path / ".wtplan.yml"
+    cache = InventoryCache()
+    parses = []
+    real = inventory.load_inventory
+    monkeypatch.setattr(inventory, "load_inventory", lambda p: parses.append(p) or real(p))
+
+    first = cache.get(path)
+    assert cache.get(path) is first
+    assert len(parses) == 1
+    assert first.paths.workspaces_dir == (tmp_path / "worktrees").resolve()
+    assert first.policy.type == "symlink"
+
+    data = load_inventory(path)
+    data["default_policy"]["links_repo_root"]["type"] = "copy"
+    write_inventory(path, data)
+
+    second = cache.get(path)
+    assert second is not first
+    assert second.policy.type == "copy"
+
+
+def test_inventory_cache_missing_file(tmp_path: Path):
+    with pytest.raises(FileNotFoundError):
+        InventoryCache().get(tmp_path / ".wtplan.yml")
+
+
+def test_write_inventory_output_matches_pure_python_dumper(tmp_path: Path):
+    data = load_inventory(ensure_inventory(tmp_path))
+    data["toolbox_dir"] = "/srv/tööl box"
+    data["workspaces"] = {"preset/web/1": {"path": "/srv/worktrees/APP_ISSUE_0001/app", "note": "a: b", "empty": ""}}
+    path = tmp_path / "out.yml"
+    write_inventory(path, data)
+
+    expected = yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+    assert path.read_text(encoding="utf-8") == expected
+    assert load_inventory(path) == data
+
+
+def test_libyaml_used_for_reads_when_available():
+    if not yaml.__with_libyaml__:
+        pytest.skip("PyYAML built without libyaml")
+    assert inventory.YAML_LOADER is yaml.CSafeLoader
+    assert inventory.YAML_DUMPER is yaml.SafeDumper
+
+
+def test_written_bytes_do_not_depend_on_libyaml(tmp_path: Path):
+    data = {"": "empty key", "bell\x07": "esc\x1b", "tab": "a\tb", "workspaces": {"": {"path": ""}}}
+    path = tmp_path / "out.yml"
+    write_inventory(path, data)
+
+    text = path.read_text(encoding="utf-8")
+    assert text.startswith("? ''\n: empty key\n")
+    assert '"bell\\a": "esc\\e"' in text
+    assert load_inventory(path) == data
+
+
+def _add_presets(path: str, prefix: str, n: int) -> None:
+    for i in range(n):
+        with update_inventory(Path(path)) as data:
+            data["presets"][f"{prefix}{i}"] = {"repos": [f"{prefix}{i}"]}
+
+
+def test_concurrent_updates_are_not_lost(tmp_path: Path):
+    path = ensure_inventory(tmp_path)
+    n = 10
+    with ProcessPoolExecutor(max_workers=2) as procs, ThreadPoolExecutor(max_workers=4) as threads:
+        futures = [procs.submit(_add_presets, str(path), f"p{i}-", n) for i in range(2)]
+        futures += [threads.submit(_add_presets, str(path), f"t{i}-", n) for i in range(4)]
+        for f in futures:
+            f.result()
+
+    assert len(load_inventory(path)["presets"]) == 6 * n
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".wtplan.yml", ".wtplan.yml.lock"]
+
+
+def test_stale_write_is_refused(tmp_path: Path):
+    path = ensure_inventory(tmp_path)
+    mode = 0o640
+    path.chmod(mode)
+    stamp = inventory_stamp(path)
+    data = load_inventory(path)
+    write_inventory(path, {**data, "toolbox_dir": "/a"}, expected_stamp=stamp)
+    assert path.stat().st_mode & 0o777 == mode
+
+    with pytest.raises(InventoryConflictError):
+        write_inventory(path, {**data, "toolbox_dir": "/b"}, expected_stamp=stamp)
+    assert load_inventory(path)["toolbox_dir"] == "/a"
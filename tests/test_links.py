@@ -0,0 +1,446 @@
+"""Tests for links_repo_root planning and applying."""
+
+import errno
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from wtplan import sync
+from wtplan.core import apply_links, plan_links
+from wtplan.manifest import MANIFEST_VERSION, LinkManifest, link_manifest_path
+from wtplan.policy import LinkPolicy, effective_policy
+from wtplan.workers import ApplyCancelledError, InlineExecutor, Transfer
+
+
+def _inv(toolbox: Path, **item) -> dict:
+    return {"toolbox_dir": str(toolbox), "links_repo_root": [{"source": "cfg", **item}]}
+
+
+@pytest.fixture
+def toolbox(tmp_path: Path) -> Path:
+    tb = tmp_path / "toolbox"
+    (tb / "cfg" / "sub").mkdir(parents=True)
+    (tb / "cfg" / "a.txt").write_text("alpha")
+    (tb / "cfg" / "sub" / "b.txt").write_text("beta")
+    (tb / ".env").write_text("KEY=1\n")
+    return tb
+
+
+class TestPlanCopy:
+    """Copy-mode change detection."""
+
+    def test_missing_target_is_add(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [p.kind for p in plan] == ["ADD"]
+
+    def test_unchanged_tree_reads_no_content(self, toolbox, tmp_path, monkeypatch):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+
+        def _fail(path):
+            raise AssertionError(f"content read: {path}")
+
+        monkeypatch.setattr(sync, "file_digest", _fail)
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [(p.kind, p.detail) for p in plan] == [("NOOP", "already copied")]
+
+    def test_same_size_edit_is_detected(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        (ws / "cfg" / "a.txt").write_text("ALPHA")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True))
+        assert [(p.kind, Path(p.target).name) for p in plan] == [("UPDATE", "a.txt")]
+
+    def test_touched_but_identical_file_updates_mtime(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        os.utime(ws / "cfg" / "a.txt", ns=(0, 0))
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [(p.kind, p.detail) for p in plan] == [("UPDATE", "update mode/mtime (same content)")]
+
+        apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert (ws / "cfg" / "a.txt").stat().st_mtime_ns == (toolbox / "cfg" / "a.txt").stat().st_mtime_ns
+        assert [p.kind for p in plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))] == ["NOOP"]
+
+    def test_chmod_on_source_reaches_copy(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        (toolbox / "cfg" / "a.txt").chmod(0o755)
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [(p.kind, Path(p.target).name) for p in plan] == [("UPDATE", "a.txt")]
+
+        applied = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [(a.kind, a.detail) for a in applied] == [("UPDATE", "updated mode/mtime (same content)")]
+        assert (ws / "cfg" / "a.txt").stat().st_mode == (toolbox / "cfg" / "a.txt").stat().st_mode
+
+    def test_per_file_items_for_directory(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        (ws / "cfg" / "sub" / "b.txt").unlink()
+        (ws / "cfg" / "extra.txt").write_text("x")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True, delete=True))
+        got = {(p.kind, str(Path(p.target).relative_to(ws))) for p in plan}
+        assert got == {("ADD", "cfg/sub/b.txt"), ("DELETE", "cfg/extra.txt")}
+
+    def test_extras_kept_without_delete(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        (ws / "cfg" / "extra.txt").write_text("x")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True))
+        assert [p.kind for p in plan] == ["NOOP"]
+
+    def test_differences_without_force_conflict(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        shutil.copytree(toolbox / "cfg", ws / "cfg")
+        (ws / "cfg" / "a.txt").write_text("changed")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [p.kind for p in plan] == ["CONFLICT"]
+
+
+class TestPlanSymlink:
+    """Symlink-mode detection."""
+
+    def test_existing_symlink_is_noop(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        (ws / "cfg").symlink_to(toolbox / "cfg")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy())
+        assert [(p.kind, p.target) for p in plan] == [("NOOP", str(ws.resolve() / "cfg"))]
+
+
+class TestManifest:
+    """Link-state manifest fast path."""
+
+    def _apply(self, toolbox, ws):
+        manifest = LinkManifest.load(link_manifest_path(ws))
+        apply_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True), manifest=manifest)
+        return link_manifest_path(ws)
+
+    def test_manifest_lives_beside_worktree(self, tmp_path):
+        ws = tmp_path / "APP_ISSUE_0001" / "app"
+        assert link_manifest_path(ws).parent == ws.parent
+
+    def test_replan_does_not_diff_destination(self, toolbox, tmp_path, monkeypatch):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = self._apply(toolbox, ws)
+        assert path.exists()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("destination walked")
+
+        monkeypatch.setattr("wtplan.core.diff_path", _fail)
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"), manifest=LinkManifest.load(path))
+        assert [(p.kind, p.detail) for p in plan] == [("NOOP", "unchanged since last apply")]
+
+    def test_source_edit_invalidates(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = self._apply(toolbox, ws)
+        (toolbox / "cfg" / "a.txt").write_text("changed!")
+
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True), manifest=LinkManifest.load(path))
+        assert [(p.kind, Path(p.target).name) for p in plan] == [("UPDATE", "a.txt")]
+
+    def test_replaced_identical_source_matches_by_digest(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = self._apply(toolbox, ws)
+        src = toolbox / "cfg" / "a.txt"
+        shutil.copy2(src, toolbox / "a.tmp")
+        os.replace(toolbox / "a.tmp", src)
+
+        manifest = LinkManifest.load(path)
+        assert manifest.is_current(toolbox / "cfg", ws.resolve() / "cfg", LinkPolicy(type="copy"))
+
+    def test_source_chmod_or_touch_invalidates(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = self._apply(toolbox, ws)
+        src = toolbox / "cfg" / "a.txt"
+        manifest = LinkManifest.load(path)
+
+        src.chmod(0o755)
+        assert not manifest.is_current(toolbox / "cfg", ws.resolve() / "cfg", LinkPolicy(type="copy"))
+        path = self._apply(toolbox, ws)
+        assert LinkManifest.load(path).is_current(toolbox / "cfg", ws.resolve() / "cfg", LinkPolicy(type="copy"))
+
+        os.utime(src, ns=(0, 0))
+        plan = plan_links(_inv(toolbox), ws, LinkPolicy(type="copy"), manifest=LinkManifest.load(path))
+        assert [(p.kind, p.detail) for p in plan] == [("UPDATE", "update mode/mtime (same content)")]
+
+    def test_older_manifest_version_is_ignored(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = self._apply(toolbox, ws)
+        data = json.loads(path.read_text())
+        path.write_text(json.dumps({**data, "version": MANIFEST_VERSION - 1}))
+
+        assert LinkManifest.load(path).links == {}
+
+    def test_drifted_destination_is_repaired(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        path = link_manifest_path(ws)
+        pol = LinkPolicy(type="copy", force=True, delete=True)
+        apply_links(_inv(toolbox), ws, pol, manifest=LinkManifest.load(path))
+        (ws / "cfg" / "a.txt").write_text("edited in place")
+        (ws / "cfg" / "sub" / "b.txt").unlink()
+        (ws / "cfg" / "extra.txt").write_text("x")
+
+        plan = plan_links(_inv(toolbox), ws, pol, manifest=LinkManifest.load(path))
+        got = {(p.kind, str(Path(p.target).relative_to(ws.resolve()))) for p in plan}
+        assert got == {("UPDATE", "cfg/a.txt"), ("ADD", "cfg/sub/b.txt"), ("DELETE", "cfg/extra.txt")}
+
+        apply_links(_inv(toolbox), ws, pol, manifest=LinkManifest.load(path))
+        assert (ws / "cfg" / "a.txt").read_text() == "alpha"
+        assert (ws / "cfg" / "sub" / "b.txt").read_text() == "beta"
+        assert not (ws / "cfg" / "extra.txt").exists()
+        again = plan_links(_inv(toolbox), ws, pol, manifest=LinkManifest.load(path))
+        assert [(p.kind, p.detail) for p in again] == [("NOOP", "unchanged since last apply")]
+
+
+class TestApplyCopy:
+    """Incremental copy-mode apply."""
+
+    def test_reapply_writes_nothing(self, toolbox, tmp_path, monkeypatch):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        first = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert {p.kind for p in first} == {"ADD"}
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("file rewritten")
+
+        monkeypatch.setattr(sync, "_copy_file", _fail)
+        again = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True))
+        assert [(p.kind, p.detail) for p in again] == [("NOOP", "already copied")]
+
+    def test_only_changed_files_copied_and_extras_deleted(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        (toolbox / "cfg" / "a.txt").write_text("new alpha")
+        (ws / "cfg" / "sub" / "stale.txt").write_text("x")
+
+        out = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy", force=True, delete=True))
+        got = [(p.kind, str(Path(p.target).relative_to(ws.resolve()))) for p in out]
+        assert got == [("UPDATE", "cfg/a.txt"), ("DELETE", "cfg/sub/stale.txt")]
+        assert (ws / "cfg" / "a.txt").read_text() == "new alpha"
+        assert not (ws / "cfg" / "sub" / "stale.txt").exists()
+
+    def test_preserves_mode_times_and_symlinks(self, toolbox, tmp_path):
+        mode, mtime_ns = 0o640, 1_000_000_000
+        src = toolbox / "cfg" / "a.txt"
+        src.chmod(mode)
+        os.utime(src, ns=(mtime_ns, mtime_ns))
+        (toolbox / "cfg" / "link").symlink_to("a.txt")
+        ws = tmp_path / "ws"
+        ws.mkdir()
+
+        applied = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert {Path(p.target).name: p.detail for p in applied}["link"] == "symlink"
+        dst = ws / "cfg" / "a.txt"
+        assert dst.stat().st_mode & 0o777 == mode
+        assert dst.stat().st_mtime_ns == mtime_ns
+        assert os.readlink(ws / "cfg" / "link") == "a.txt"
+
+    def test_existing_differs_without_force_conflicts(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        (ws / "cfg").mkdir(parents=True)
+        (ws / "cfg" / "a.txt").write_text("mine")
+
+        out = apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        assert [p.kind for p in out] == ["CONFLICT"]
+        assert (ws / "cfg" / "a.txt").read_text() == "mine"
+
+
+class TestHardlink:
+    """Hardlink-mode plan/apply."""
+
+    def test_tree_shares_source_inodes(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        (toolbox / "cfg" / "link").symlink_to("a.txt")
+        out = apply_links(_inv(toolbox), ws, LinkPolicy(type="hardlink"))
+        details = {Path(p.target).name: p.detail for p in out}
+        assert details == {
+            "cfg": "hardlinked dir",
+            "a.txt": "hardlinked file",
+            "link": "symlink",
+            "sub": "hardlinked dir",
+            "b.txt": "hardlinked file",
+        }
+        assert (ws / "cfg" / "sub" / "b.txt").stat().st_ino == (toolbox / "cfg" / "sub" / "b.txt").stat().st_ino
+        assert not (ws / "cfg").is_symlink()
+
+        again = plan_links(_inv(toolbox), ws, LinkPolicy(type="hardlink"))
+        assert [(p.kind, p.detail) for p in again] == [("NOOP", "already linked")]
+
+    def test_identical_copy_is_accepted(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        apply_links(_inv(toolbox), ws, LinkPolicy(type="copy"))
+        out = plan_links(_inv(toolbox), ws, LinkPolicy(type="hardlink"))
+        assert [(p.kind, p.detail) for p in out] == [("NOOP", "already linked")]
+
+    @pytest.mark.parametrize("err", [errno.EPERM, errno.EMLINK])
+    def test_fallback_copy_is_current_on_next_plan(self, toolbox, tmp_path, monkeypatch, err):
+        def _refuse(src, dst):
+            raise OSError(err, os.strerror(err))
+
+        monkeypatch.setattr(sync.os, "link", _refuse)
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        apply_links(_inv(toolbox), ws, LinkPolicy(type="hardlink"))
+        assert (ws / "cfg" / "a.txt").stat().st_nlink == 1
+
+        again = plan_links(_inv(toolbox), ws, LinkPolicy(type="hardlink"))
+        assert [p.kind for p in again] == ["NOOP"]
+
+    def test_falls_back_to_copy_across_devices(self, toolbox, tmp_path, monkeypatch):
+        def _exdev(src, dst):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(sync.os, "link", _exdev)
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        out = apply_links(_inv(toolbox, source=".env"), ws, LinkPolicy(type="hardlink"))
+        assert out[0].kind == "ADD"
+        assert (ws / ".env").read_text() == "KEY=1\n"
+        assert (ws / ".env").stat().st_nlink == 1
+
+    def test_unknown_type_conflicts(self, toolbox, tmp_path):
+        out = plan_links(_inv(toolbox, type="reflink"), tmp_path, LinkPolicy())
+        assert [p.kind for p in out] == ["CONFLICT"]
+        assert out[0].detail.startswith("unknown link type: reflink")
+
+        inv = {**_inv(toolbox), "default_policy": {"links_repo_root": {"type": "rsync"}}}
+        out = apply_links(inv, tmp_path, effective_policy(inv, cli_force=False, cli_delete=False))
+        assert [p.kind for p in out] == ["CONFLICT"]
+        assert out[0].detail.startswith("unknown link type: rsync")
+        assert not (tmp_path / "cfg").exists()
+
+
+class TestParallelApply:
+    """Bounded worker pool for apply_links."""
+
+    def _big_inv(self, toolbox: Path) -> dict:
+        for i in range(20):
+            (toolbox / "cfg" / "sub" / f"f{i:02d}.txt").write_text(str(i) * i)
+        return {
+            "toolbox_dir": str(toolbox),
+            "links_repo_root": [{"source": "cfg"}, {"source": ".env"}, {"source": "cfg", "target": "more"}],
+        }
+
+    def test_jobs_do_not_change_result_order(self, toolbox, tmp_path):
+        inv = self._big_inv(toolbox)
+        serial_ws, parallel_ws = tmp_path / "s", tmp_path / "p"
+        serial_ws.mkdir()
+        parallel_ws.mkdir()
+
+        serial = apply_links(inv, serial_ws, LinkPolicy(type="copy"), jobs=1)
+        parallel = apply_links(inv, parallel_ws, LinkPolicy(type="copy"), jobs=4)
+
+        def rel(items, ws):
+            return [(p.kind, str(Path(p.target).relative_to(ws.resolve()))) for p in items]
+
+        assert rel(serial, serial_ws) == rel(parallel, parallel_ws)
+        assert (parallel_ws / "more" / "sub" / "f19.txt").read_text() == "19" * 19
+
+    def test_overlapping_targets_conflict(self, toolbox, tmp_path):
+        inv = {"toolbox_dir": str(toolbox), "links_repo_root": [{"source": "cfg"}, {"source": ".env", "target": "cfg/.env"}]}
+        ws = tmp_path / "ws"
+        ws.mkdir()
+
+        out = apply_links(inv, ws, LinkPolicy(type="copy"), jobs=2)
+        assert out[-1].kind == "CONFLICT"
+        assert "overlaps" in out[-1].detail
+
+
+class TestProgressAndCancel:
+    """Per-item progress and cancellation through a Transfer."""
+
+    def test_progress_per_file_and_item_with_running_totals(self, toolbox, tmp_path):
+        inv = {"toolbox_dir": str(toolbox), "links_repo_root": [{"source": "cfg"}, {"source": ".env"}]}
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        events = []
+        transfer = Transfer(lambda s, m: events.append((Path(s).name, m)), interval=0)
+
+        apply_links(inv, ws, LinkPolicy(type="copy"), transfer=transfer)
+        assert [s for s, _ in events] == ["a.txt", "b.txt", "cfg", ".env", ".env"]
+        assert events[2][1].endswith("(2 files, 9 bytes copied so far)")
+        assert events[-1][1].endswith("(3 files, 15 bytes copied so far)")
+
+    def test_per_file_progress_is_throttled(self, toolbox, tmp_path):
+        events = []
+        transfer = Transfer(lambda s, m: events.append(Path(s).name), interval=3600)
+        sync.sync_path(toolbox / "cfg", tmp_path / "ws", transfer=transfer)
+        assert events == ["a.txt"]
+
+    def test_cancel_stops_between_items_and_keeps_finished_ones(self, toolbox, tmp_path):
+        inv = {"toolbox_dir": str(toolbox), "links_repo_root": [{"source": "cfg"}, {"source": ".env"}]}
+        ws = tmp_path / "ws"
+        ws.mkdir()
+        manifest = LinkManifest.load(link_manifest_path(ws))
+        transfer = Transfer(lambda s, m: Path(s).name == "cfg" and transfer.cancel.set())
+
+        with pytest.raises(ApplyCancelledError):
+            apply_links(inv, ws, LinkPolicy(type="copy"), manifest=manifest, transfer=transfer)
+        assert (ws / "cfg" / "sub" / "b.txt").read_text() == "beta"
+        assert not (ws / ".env").exists()
+        assert list(LinkManifest.load(link_manifest_path(ws)).links) == [str((ws / "cfg").resolve())]
+
+    def _cancel_after_first_file(self):
+        transfer = Transfer()
+        calls = []
+
+        def _cancel_after_first(size):
+            calls.append(size)
+            transfer.cancel.set()
+
+        transfer.copied = _cancel_after_first
+        return transfer, calls
+
+    def test_cancel_removes_a_tree_it_was_creating(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        transfer, calls = self._cancel_after_first_file()
+        with pytest.raises(ApplyCancelledError):
+            sync.sync_path(toolbox / "cfg", ws, transfer=transfer, executor=InlineExecutor())
+        assert not ws.exists()
+        assert len(calls) == 1
+
+    def test_cancel_keeps_replaced_files_of_an_existing_tree(self, toolbox, tmp_path):
+        ws = tmp_path / "ws"
+        shutil.copytree(toolbox / "cfg", ws)
+        (toolbox / "cfg" / "a.txt").write_text("new alpha")
+        (toolbox / "cfg" / "sub" / "b.txt").write_text("new beta")
+        transfer, calls = self._cancel_after_first_file()
+
+        with pytest.raises(ApplyCancelledError):
+            sync.sync_path(toolbox / "cfg", ws, transfer=transfer)
+        assert [(ws / "a.txt").read_text(), (ws / "sub" / "b.txt").read_text()] == ["new alpha", "beta"]
+        assert len(calls) == 1
+        assert sorted(p.name for p in ws.rglob("*")) == ["a.txt", "b.txt", "sub"]
+
+        assert [c.rel for c in sync.sync_path(toolbox / "cfg", ws)] == ["sub/b.txt"]
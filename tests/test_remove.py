@@ -0,0 +1,43 @@
+"""Tests for safe workspace removal."""
+
+from conftest import call_tool
+
+from wtplan import mcp_server
+from wtplan.git import run_git
+
+
+def test_remove_clean_workspace(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=61, apply=True)
+    ws = project / "worktrees" / "APP_ISSUE_0061"
+
+    planned = call_tool(mcp_server.tool_preset_rm, preset="web", issue_iid=61)
+    # the .env link wtplan created is not a dirty change
+    assert planned["status"] == {"app": "clean", "lib": "clean"}
+    assert [p["kind"] for p in planned["plan"]] == ["DELETE", "DELETE"]
+    assert ws.is_dir()
+
+    res = call_tool(mcp_server.tool_preset_rm, preset="web", issue_iid=61, apply=True, jobs=2)
+    assert res["removed"] is True
+    assert not ws.exists()
+    assert "APP_ISSUE_0061" not in run_git(["--git-dir", str(project / "bare" / "app.git"), "worktree", "list"])
+    assert call_tool(mcp_server.tool_list)["workspaces"] == []
+
+
+def test_remove_refuses_dirty_and_unpushed_unless_forced(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=62, apply=True)
+    ws = project / "worktrees" / "APP_ISSUE_0062"
+    (ws / "app" / "notes.txt").write_text("wip\n")
+    (ws / "lib" / "README.md").write_text("changed\n")
+    env = ["-c", "user.name=t", "-c", "user.email=t@example.com"]
+    run_git([*env, "commit", "-q", "-am", "local"], cwd=ws / "lib")
+
+    res = call_tool(mcp_server.tool_preset_rm, preset="web", issue_iid=62, apply=True)
+    assert res["status"] == {"app": "dirty", "lib": "unpushed"}
+    assert res["removed"] is False
+    assert "use --force" in res["result"][0]["detail"]
+    assert (ws / "app" / "notes.txt").exists()
+    assert (ws / "lib").is_dir()
+
+    res = call_tool(mcp_server.tool_preset_rm, preset="web", issue_iid=62, force=True, apply=True)
+    assert res["removed"] is True
+    assert not ws.exists()
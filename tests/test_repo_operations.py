@@ -1,11 +1,14 @@
 """Tests for wtplan repo operations and links/copy functionality."""
 
 import os
+import threading
 
+import anyio
 import pytest
+from conftest import call_tool
 from typer.testing import CliRunner
 
-from wtplan import mcp_server
+from wtplan import mcp_server, tools
 from wtplan.cli import app
 
 test_env = os.environ.copy()
@@ -158,6 +161,13 @@ class TestApplyFlag:
         assert result.exit_code == 0
         assert "--apply" in result.output
 
+    def test_add_commands_accept_jobs(self):
+        """Test preset add and repo add accept --jobs."""
+        for group in ("preset", "repo"):
+            result = runner.invoke(app, [group, "add", "--help"])
+            assert result.exit_code == 0
+            assert "--jobs" in result.output
+
 
 class TestDeprecatedCommands:
     """Tests for deprecated commands."""
@@ -184,7 +194,8 @@ class TestMCPFunctions:
             "presets:\n  test-preset:\n    primary_repo: test-repo\n    repos:\n      - test-repo\n"
         )
 
-        result = mcp_server.tool_preset_add(
+        result = call_tool(
+            mcp_server.tool_preset_add,
             preset="test-preset",
             issue_iid=1,
             base=str(tmp_path),
@@ -200,7 +211,8 @@ class TestMCPFunctions:
         monkeypatch.chdir(tmp_path)
         (tmp_path / ".wtplan.yml").write_text("presets:\n  test:\n    primary_repo: r\n    repos:\n      - r\n")
 
-        result = mcp_server.tool_preset_add(
+        result = call_tool(
+            mcp_server.tool_preset_add,
             preset="nonexistent",
             issue_iid=1,
             apply=False,
@@ -217,7 +229,8 @@ class TestMCPFunctions:
         (tmp_path / ".wtplan.yml").write_text("presets: {}")
 
         with pytest.raises(KeyError):
-            mcp_server.tool_preset_path(
+            call_tool(
+                mcp_server.tool_preset_path,
                 preset="nonexistent",
                 issue_iid=1,
             )
@@ -228,7 +241,8 @@ class TestMCPFunctions:
         monkeypatch.chdir(tmp_path)
         (tmp_path / ".wtplan.yml").write_text("repos:\n  my-repo:\n    path: /tmp/my-repo\n")
 
-        result = mcp_server.tool_repo_add(
+        result = call_tool(
+            mcp_server.tool_repo_add,
             repo="my-repo",
             issue_iid=1,
             base=str(tmp_path),
@@ -244,7 +258,8 @@ class TestMCPFunctions:
         monkeypatch.chdir(tmp_path)
         (tmp_path / ".wtplan.yml").write_text("repos:\n  my-repo:\n    path: /tmp/my-repo\n")
 
-        result = mcp_server.tool_repo_add(
+        result = call_tool(
+            mcp_server.tool_repo_add,
             repo="nonexistent",
             issue_iid=1,
             apply=False,
@@ -254,6 +269,35 @@ class TestMCPFunctions:
         assert result is not None
         assert "plan" in result
 
+    def test_slow_apply_does_not_block_path_lookups(self, tmp_path, monkeypatch):
+        """Blocking tool work runs off the event loop, so other tools still answer."""
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / ".wtplan.yml").write_text("presets:\n  web:\n    primary_repo: app\n    repos:\n      - app\n")
+        release = threading.Event()
+
+        def slow_add(*args, **kwargs):
+            assert release.wait(timeout=10), "event loop was blocked by the apply"
+            return {"apply": True}
+
+        monkeypatch.setattr(tools, "workspace_add", slow_add)
+        order = []
+
+        async def add():
+            order.append((await mcp_server.tool_preset_add(preset="web", issue_iid=1, apply=True))["apply"])
+
+        async def path():
+            order.append((await mcp_server.tool_preset_path(preset="web", issue_iid=1))["path"])
+            release.set()
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(add)
+                tg.start_soon(path)
+
+        anyio.run(main)
+        assert order[1] is True
+
 
 class TestEdgeCases:
     """Tests for edge cases and error handling."""
@@ -264,7 +308,8 @@ class TestEdgeCases:
         monkeypatch.chdir(tmp_path)
 
         with pytest.raises(FileNotFoundError):
-            mcp_server.tool_preset_add(
+            call_tool(
+                mcp_server.tool_preset_add,
                 preset="test",
                 issue_iid=1,
                 apply=False,
@@ -283,7 +328,8 @@ class TestEdgeCases:
         monkeypatch.chdir(tmp_path)
         (tmp_path / ".wtplan.yml").write_text("presets:\n  test:\n    primary_repo: r\n    repos:\n      - r\n")
 
-        result = mcp_server.tool_preset_add(
+        result = call_tool(
+            mcp_server.tool_preset_add,
             preset="test",
             issue_iid=1,
             base=str(tmp_path),
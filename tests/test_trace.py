@@ -0,0 +1,76 @@
+"""Tests for opt-in timing spans."""
+
+import json
+
+import yaml
+from typer.testing import CliRunner
+
+from wtplan import trace
+from wtplan.cli import app
+from wtplan.workers import worker_pool
+
+
+@trace.traced("work")
+def _work(jobs):
+    def step(n):
+        with trace.span("step", n=n):
+            trace.count(files=1, bytes=n)
+        return n
+
+    with worker_pool(jobs, "t") as pool:
+        total = sum(f.result() for f in [pool.submit(step, n) for n in (10, 20, 30)])
+    return {"total": total}
+
+
+def test_disabled_is_a_no_op(monkeypatch):
+    monkeypatch.delenv(trace.TRACE_ENV, raising=False)
+    assert trace.span("x") is trace.NO_SPAN
+    assert _work(2) == {"total": 60}
+
+
+def test_spans_follow_worker_threads_into_chrome_trace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(trace.TRACE_ENV, "1")
+    res = _work(3)
+    root, *steps = res["trace"]["spans"]
+    assert root["name"] == "work"
+    assert {s["parent"] for s in steps} == {root["id"]}
+    step = res["trace"]["summary"]["step"]
+    assert (step["count"], step["files"], step["bytes"]) == (3, 3, 60)
+    assert "n" not in step  # labels are not summed
+
+    events = json.loads((tmp_path / trace.DEFAULT_TRACE_FILE).read_text())["traceEvents"]
+    assert sorted(e["name"] for e in events if e["ph"] == "X") == ["step", "step", "step", "work"]
+
+
+def test_jsonl_file_is_appended(tmp_path, monkeypatch):
+    out = tmp_path / "spans.jsonl"
+    monkeypatch.setenv(trace.TRACE_ENV, str(out))
+    _work(1)
+    _work(1)
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["work", "step", "step", "step"] * 2
+
+
+def test_trace_records_phases_git_and_link_bytes(project, monkeypatch):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["links_repo_root"] = [{"source": ".env", "type": "copy"}]
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    monkeypatch.setenv("WTPLAN_TRACE", "1")
+
+    result = CliRunner().invoke(app, ["preset", "add", "web", "91", "--apply"])
+    assert result.exit_code == 0
+    traced = yaml.safe_load(result.stdout)["trace"]
+    summary = traced["summary"]
+    assert {"inventory", "resolve", "apply.worktrees", "apply.links", "git clone", "git worktree"} <= summary.keys()
+    assert summary["worktree"]["count"] == len(["app", "lib"])
+    link = next(s for s in traced["spans"] if s["name"] == "link.apply")
+    assert (link["type"], link["files"], link["bytes"]) == ("copy", 1, len("KEY=1\n"))
+    assert (project / ".wtplan-trace.json").exists()
+
+
+def test_cli_trace_flag(project, monkeypatch):
+    monkeypatch.setenv("WTPLAN_TRACE", "0")  # restored after the flag switches it on
+    result = CliRunner().invoke(app, ["--trace", "plan", "--all"])
+    assert result.exit_code == 0
+    assert '"trace"' in result.stdout
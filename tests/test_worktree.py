@@ -0,0 +1,127 @@
+"""Tests for git worktree creation from shared bare repositories."""
+
+import anyio
+import yaml
+from conftest import call_tool
+from mcp.shared.memory import create_connected_server_and_client_session
+from typer.testing import CliRunner
+
+from wtplan import mcp_server, tools
+from wtplan.cli import app
+from wtplan.git import run_git
+
+
+def test_plan_lists_worktrees(project):
+    res = call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=7)
+    assert [w["kind"] for w in res["worktrees"]] == ["ADD", "ADD"]
+    assert not (project / "bare").exists()
+
+
+def test_apply_creates_worktrees_from_shared_bare(project):
+    res = call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=7, apply=True)
+    assert [w["kind"] for w in res["worktrees"]] == ["ADD", "ADD"]
+
+    ws = project / "worktrees" / "APP_ISSUE_0007"
+    assert (ws / "app" / "README.md").exists()
+    assert (ws / "lib" / "README.md").exists()
+    # worktrees point at the shared bare clone instead of owning an object store
+    assert (ws / "app" / ".git").is_file()
+    assert (project / "bare" / "app.git" / "worktrees").is_dir()
+    # links_repo_root lands in the primary worktree
+    assert (ws / "app" / ".env").is_symlink()
+
+
+def test_second_issue_reuses_bare(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=1, apply=True)
+    res = call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=2)
+    assert "existing bare" in res["worktrees"][0]["detail"]
+
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=2, apply=True)
+    listed = run_git(["--git-dir", str(project / "bare" / "app.git"), "worktree", "list", "--porcelain"])
+    assert "APP_ISSUE_0001/app" in listed
+    assert "APP_ISSUE_0002/app" in listed
+
+
+def test_reapply_is_noop(project):
+    call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=3, apply=True)
+    res = call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=3, apply=True)
+    assert [w["kind"] for w in res["worktrees"]] == ["NOOP", "NOOP"]
+
+
+def test_repo_without_url_conflicts(project):
+    res = call_tool(mcp_server.tool_repo_add, repo="unknown", issue_iid=1, apply=True)
+    assert res["worktrees"][0]["kind"] == "CONFLICT"
+    assert res["result"][0]["kind"] == "CONFLICT"
+
+
+def test_concurrent_apply_streams_progress(project):
+    events = []
+    res = tools.workspace_add(
+        tools.WorkspaceMode.PRESET, "web", 9, apply=True, jobs=2, progress=lambda s, m: events.append((s, m))
+    )
+    assert [w["kind"] for w in res["worktrees"]] == ["ADD", "ADD"]
+    assert ("app", "done") in events
+    assert ("lib", "done") in events
+    assert any(m.startswith("cloning bare") for s, m in events if s == "lib")
+
+
+def test_mcp_apply_sends_progress_notifications(project):
+    messages = []
+
+    async def on_progress(progress, total, message):
+        messages.append((progress, message))
+
+    async def main():
+        async with create_connected_server_and_client_session(mcp_server.mcp) as session:
+            args = {"preset": "web", "issue_iid": 6, "apply": True, "jobs": 1}
+            return await session.call_tool("preset_add", args, progress_callback=on_progress)
+
+    res = anyio.run(main)
+    assert not res.isError
+    assert [p for p, _ in messages] == list(range(1, len(messages) + 1))
+    assert "[app] done" in [m for _, m in messages]
+    assert "/app/.env] symlink -> " in messages[-1][1]
+    assert messages[-1][1].endswith("(0 files, 0 bytes copied so far)")
+
+
+def test_cli_progress_goes_to_stderr(project):
+    result = CliRunner().invoke(app, ["preset", "add", "web", "4", "--apply", "--jobs", "2"])
+    assert result.exit_code == 0
+    assert "[app] done" in result.stderr
+    assert '"worktrees"' in result.stdout
+
+
+def test_sparse_and_partial_clone_profile(tmp_path, monkeypatch, make_origin):
+    mono = make_origin("mono", {"README.md": "r", "svc/a/main.py": "a", "svc/b/main.py": "b", "docs/x.md": "x"})
+    run_git(["config", "uploadpack.allowFilter", "true"], cwd=mono)
+    root = tmp_path / "project"
+    root.mkdir()
+    inv = {
+        "repos": {"mono": {"url": f"file://{mono}"}},
+        "presets": {"svc-a": {"primary_repo": "mono", "repos": ["mono"], "sparse": ["svc/a"], "filter": "blob:none"}},
+    }
+    (root / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+    monkeypatch.chdir(root)
+
+    planned = call_tool(mcp_server.tool_preset_add, preset="svc-a", issue_iid=5)
+    assert "filter blob:none" in planned["worktrees"][0]["detail"]
+    assert "sparse: svc/a" in planned["worktrees"][0]["detail"]
+
+    res = call_tool(mcp_server.tool_preset_add, preset="svc-a", issue_iid=5, apply=True)
+    assert res["worktrees"][0]["kind"] == "ADD", res
+    wt = root / "worktrees" / "MONO_ISSUE_0005" / "mono"
+    assert (wt / "README.md").exists()
+    assert (wt / "svc" / "a" / "main.py").exists()
+    assert not (wt / "svc" / "b").exists()
+    assert not (wt / "docs").exists()
+    bare = root / "bare" / "mono.git"
+    assert run_git(["--git-dir", str(bare), "config", "remote.origin.partialclonefilter"]).strip() == "blob:none"
+
+
+def test_unsupported_filter_conflicts(project):
+    inv = yaml.safe_load((project / ".wtplan.yml").read_text())
+    inv["presets"]["web"]["filter"] = {"lib": "sparse:oid=x"}
+    (project / ".wtplan.yml").write_text(yaml.safe_dump(inv))
+
+    res = call_tool(mcp_server.tool_preset_add, preset="web", issue_iid=8)
+    assert [w["kind"] for w in res["worktrees"]] == ["ADD", "CONFLICT"]